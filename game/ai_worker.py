@@ -0,0 +1,67 @@
+"""
+Runs AI moves on a background thread, so the game loop keeps handling input
+and drawing while an engine searches. Only the standard library is used; the
+scenes poll an AIMove from their update().
+"""
+import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from profiler import PROFILER
+
+# The browser build has no threads: there moves are computed on the spot
+THREADED = platform.system() != "Emscripten"
+
+_executor = None  # One worker thread, started by the first threaded move
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ai-move')
+    return _executor
+
+class AIMove:
+    """
+    An AI move being computed in the background.
+    The game must not be changed until the move is done or cancelled, since
+    the engine reads it from the worker thread.
+    """
+    def __init__(self, game, mode):
+        """
+        Starts computing `game.ai_move(mode, stop)`, timed as
+        'ai_move[<engine class>,<mode>]' while the profiler is enabled.
+        Args:
+            game (TicTacToe | Connect4): The engine, positioned with the AI to move.
+            mode (str): The AI difficulty mode.
+        """
+        self.stop = threading.Event()  # Set to make the engine give up its search
+        ai_move = game.ai_move
+        if PROFILER.enabled:
+            ai_move = PROFILER.timed(f"ai_move[{type(game).__name__},{mode}]", ai_move)
+        if THREADED:
+            self.future = _get_executor().submit(ai_move, mode, self.stop)
+        else:
+            self.future = None
+            self.move = ai_move(mode, self.stop)
+
+    def done(self):
+        """Returns True once the move is ready."""
+        return self.future is None or self.future.done()
+
+    def result(self):
+        """Returns the chosen move (waiting for it if needed), or None if there is none."""
+        if self.future is not None:
+            self.move = self.future.result()
+            self.future = None
+        return self.move
+
+    def cancel(self):
+        """
+        Abandons the move. A search stops at its next budget check, which comes
+        within a few milliseconds; this waits for that, so the game can be
+        changed as soon as it returns.
+        """
+        self.stop.set()
+        if self.future is not None and not self.future.cancel():
+            self.future.exception()  # Wait for the engine to return; its move is discarded
+        self.future = None
+        self.move = None
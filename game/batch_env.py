@@ -0,0 +1,152 @@
+"""
+Batched Tic Tac Toe and Connect 4: N games held as NumPy arrays and advanced
+together, one move per game per `step`, for training and evaluation at a
+throughput that grows with N instead of paying Python overhead per game.
+Finished games start over automatically, so every game always has a move.
+"""
+import numpy as np
+from utils import WIN_MASKS, FULL_MASK
+from connect4 import ROWS, COLS, COL_STRIDE
+from mcts import has_four_batch
+
+# Whether each of the 512 possible 9-bit masks of one player's cells holds a line
+_TTT_WINNING = np.array([any(m & w == w for w in WIN_MASKS) for m in range(1 << 9)])
+
+
+def random_legal(legal, rng):
+    """
+    Picks a uniformly random legal move in every game.
+    Args:
+        legal (numpy.ndarray): (N, moves) bool legal-move masks, as returned by `step`.
+        rng (numpy.random.Generator): Source of the random choices.
+    Returns:
+        numpy.ndarray: (N,) chosen moves.
+    """
+    return np.argmax(rng.random(legal.shape) * legal, axis=1)
+
+
+class BatchTicTacToe:
+    """
+    N Tic Tac Toe games. `boards` is (N, 9) with 0 for empty and 1 or 2 for the
+    players, as in TicTacToe.board; `current` is the player to move in each game.
+    """
+    def __init__(self, n):
+        self.n = n
+        self.boards = np.zeros((n, 9), dtype=np.int8)
+        self.masks = np.zeros((n, 2), dtype=np.uint16)  # 9-bit masks of each player's cells (see utils.WIN_MASKS)
+        self.current = np.ones(n, dtype=np.int8)
+        self.winners = np.zeros(n, dtype=np.int8)       # Winner of each game the last step finished (0 for a draw)
+        self._rows = np.arange(n)
+
+    def reset(self, which=None):
+        """
+        Starts games over.
+        Args:
+            which (numpy.ndarray): (N,) bool mask of the games to reset; None resets all.
+        Returns:
+            numpy.ndarray: (N, 9) bool legal-move masks.
+        """
+        which = slice(None) if which is None else which
+        self.boards[which] = 0
+        self.masks[which] = 0
+        self.current[which] = 1
+        return self.legal_moves()
+
+    def legal_moves(self):
+        """Returns the (N, 9) bool mask of empty cells."""
+        return self.boards == 0
+
+    def step(self, actions):
+        """
+        Plays one move in every game for its player to move.
+        Args:
+            actions (numpy.ndarray): (N,) cell indices, each legal in its game.
+        Returns:
+            tuple: (rewards, done, legal): (N,) float32 rewards for the player who
+                moved (1 for a win, else 0), (N,) bool games finished by this move
+                (already reset) and the (N, 9) bool legal-move masks.
+        """
+        actions = np.asarray(actions, dtype=np.intp)
+        rows = self._rows
+        if (self.boards[rows, actions] != 0).any():
+            raise ValueError("step() was given a move on an occupied cell")
+        player = self.current
+        self.boards[rows, actions] = player
+        side = player - 1
+        own = self.masks[rows, side] | np.left_shift(1, actions).astype(np.uint16)
+        self.masks[rows, side] = own
+        won = _TTT_WINNING[own]
+        done = won | ((self.masks[:, 0] | self.masks[:, 1]) == FULL_MASK)
+        self.winners = np.where(won, player, 0).astype(np.int8)
+        self.current = 3 - player
+        if done.any():
+            self.reset(done)
+        return won.astype(np.float32), done, self.legal_moves()
+
+
+class BatchConnect4:
+    """
+    N Connect 4 games. `boards` is (N, 6, 7) with row 0 at the top, as in
+    Connect4.board; `heights` counts the pieces in each column. Wins are found
+    on per-player uint64 bitboards laid out as in connect4.py.
+    """
+    def __init__(self, n):
+        self.n = n
+        self.boards = np.zeros((n, ROWS, COLS), dtype=np.int8)
+        self.heights = np.zeros((n, COLS), dtype=np.int8)
+        self.bitboards = np.zeros((n, 2), dtype=np.uint64)
+        self.moves = np.zeros(n, dtype=np.int8)         # Pieces on each board
+        self.current = np.ones(n, dtype=np.int8)
+        self.winners = np.zeros(n, dtype=np.int8)       # Winner of each game the last step finished (0 for a draw)
+        self._rows = np.arange(n)
+
+    def reset(self, which=None):
+        """
+        Starts games over.
+        Args:
+            which (numpy.ndarray): (N,) bool mask of the games to reset; None resets all.
+        Returns:
+            numpy.ndarray: (N, 7) bool legal-move masks.
+        """
+        which = slice(None) if which is None else which
+        self.boards[which] = 0
+        self.heights[which] = 0
+        self.bitboards[which] = 0
+        self.moves[which] = 0
+        self.current[which] = 1
+        return self.legal_moves()
+
+    def legal_moves(self):
+        """Returns the (N, 7) bool mask of columns that are not full."""
+        return self.heights < ROWS
+
+    def step(self, actions):
+        """
+        Drops one piece in every game for its player to move.
+        Args:
+            actions (numpy.ndarray): (N,) columns, each legal in its game.
+        Returns:
+            tuple: (rewards, done, legal): (N,) float32 rewards for the player who
+                moved (1 for a win, else 0), (N,) bool games finished by this move
+                (already reset) and the (N, 7) bool legal-move masks.
+        """
+        actions = np.asarray(actions, dtype=np.intp)
+        rows = self._rows
+        heights = self.heights[rows, actions]
+        if (heights >= ROWS).any():
+            raise ValueError("step() was given a move in a full column")
+        player = self.current
+        self.boards[rows, ROWS - 1 - heights, actions] = player
+        self.heights[rows, actions] = heights + 1
+        side = player - 1
+        bits = np.left_shift(np.uint64(1), (actions * COL_STRIDE + heights).astype(np.uint64))
+        own = self.bitboards[rows, side] | bits
+        self.bitboards[rows, side] = own
+        self.moves += 1
+        won = has_four_batch(own)
+        done = won | (self.moves == ROWS * COLS)
+        self.winners = np.where(won, player, 0).astype(np.int8)
+        self.current = 3 - player
+        if done.any():
+            self.reset(done)
+        return won.astype(np.float32), done, self.legal_moves()
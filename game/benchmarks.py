@@ -0,0 +1,712 @@
+"""
+Benchmark suite for the game engines, AI modes and Q-table persistence.
+Everything runs headless; no display or fonts are initialised.
+
+Run from the game directory:
+    python benchmarks.py                        # print every result
+    python benchmarks.py --json results.json    # also write them as JSON
+    python benchmarks.py --baseline base.json   # fail (exit 1) on regressions against a saved run
+    python benchmarks.py --filter rps --quick   # only the rps cases, with fewer iterations
+Pass --large to include the 10^7-entry Q-table case (needs a few GB of RAM).
+Every result is seconds per operation, so lower is better.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import ttt
+from connect4 import Connect4, ConnectK, ROWS, COLS
+from ttt import TicTacToe
+from rps import RPS
+from utils import check_win, RPS_CHOICES
+from persistence import load_q_table, save_q_table
+from opening_book import open_book, BOOK_FILE
+
+SCHEMA_VERSION = 1
+CORE_MODULES = ('utils', 'ttt', 'rps', 'connect4', 'qtable', 'persistence')
+IMPORT_BUDGET = 0.050  # Seconds allowed to import the core modules in a fresh interpreter
+BENCHMARKS = []  # Case functions, run in definition order
+INFO = {}  # Measurements that are not timings (e.g. memory), reported alongside the results
+
+
+def benchmark(*names):
+    """
+    Registers a case: a function of `quick` that yields (name, seconds per operation) pairs.
+    Args:
+        names (str): Prefixes of the result names (and INFO keys) the case produces,
+            which --filter matches against before running it.
+    """
+    def register(func):
+        func.names = names
+        BENCHMARKS.append(func)
+        return func
+    return register
+
+
+def selected(case, pattern):
+    """Whether a case can produce a result matching --filter `pattern`, so it is worth running."""
+    return not pattern or any(pattern in name or name in pattern for name in case.names)
+
+
+def per_call(func, calls, repeat=3):
+    """Runs `func()` (which performs `calls` operations) `repeat` times; returns the best seconds per operation."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best / calls
+
+
+class ListConnect4:
+    """
+    The original list-of-lists Connect 4 engine, kept as the speed baseline.
+    `check_win` scans every window of four on the board.
+    """
+    def __init__(self):
+        self.new_round()
+
+    def new_round(self):
+        self.board = [[0] * COLS for _ in range(ROWS)]
+        self.current = 1
+        self.game_over = False
+
+    def play(self, col):
+        if self.game_over or self.board[0][col] != 0:
+            return None
+        row = self.get_next_open_row(col)
+        self.board[row][col] = self.current
+        win_combo = self.check_win(self.current)
+        if win_combo:
+            self.game_over = True
+            return (self.current, win_combo)
+        if all(self.board[0][c] != 0 for c in range(COLS)):
+            self.game_over = True
+            return (0, None)
+        self.current = 3 - self.current
+        return None
+
+    def get_next_open_row(self, col):
+        for r in range(ROWS - 1, -1, -1):
+            if self.board[r][col] == 0:
+                return r
+        return None
+
+    def check_win(self, player):
+        for c in range(COLS - 3):
+            for r in range(ROWS):
+                if all(self.board[r][c+i] == player for i in range(4)):
+                    return [(r, c+i) for i in range(4)]
+        for c in range(COLS):
+            for r in range(ROWS - 3):
+                if all(self.board[r+i][c] == player for i in range(4)):
+                    return [(r+i, c) for i in range(4)]
+        for c in range(COLS - 3):
+            for r in range(ROWS - 3):
+                if all(self.board[r+i][c+i] == player for i in range(4)):
+                    return [(r+i, c+i) for i in range(4)]
+        for c in range(COLS - 3):
+            for r in range(3, ROWS):
+                if all(self.board[r-i][c+i] == player for i in range(4)):
+                    return [(r-i, c+i) for i in range(4)]
+        return None
+
+    def valid_moves(self):
+        return [c for c in range(COLS) if self.board[0][c] == 0]
+
+    def ai_move(self, mode):
+        moves = self.valid_moves()
+        if mode == 'biassed':
+            for player in (2, 1):
+                for col in moves:
+                    row = self.get_next_open_row(col)
+                    self.board[row][col] = player
+                    won = self.check_win(player)
+                    self.board[row][col] = 0
+                    if won:
+                        return col
+            if COLS // 2 in moves:
+                return COLS // 2
+        return random.choice(moves)
+
+
+def random_c4_games(games, seed=0, make=Connect4):
+    """Records the column sequences of `games` random Connect 4 (or `make()` Connect-K) games."""
+    rng = random.Random(seed)
+    records = []
+    for _ in range(games):
+        engine = make()
+        cols = []
+        while not engine.game_over:
+            col = rng.choice(engine.valid_moves())
+            engine.play(col)
+            cols.append(col)
+        records.append(cols)
+    return records
+
+
+def random_positions(make, plies, count, seed=0):
+    """Builds `count` unfinished games by playing up to `plies` random moves in each."""
+    rng = random.Random(seed)
+    games = []
+    while len(games) < count:
+        game = make()
+        for _ in range(rng.randint(0, plies)):
+            move = rng.choice(game.valid_moves() if isinstance(game, ConnectK) else
+                              [i for i, v in enumerate(game.board) if v == 0])
+            if game.play(move) is not None:
+                break
+        if not game.game_over:
+            games.append(game)
+    return games
+
+
+def replay(engine_cls, records):
+    engine = engine_cls()
+    for cols in records:
+        engine.new_round()
+        for col in cols:
+            engine.play(col)
+
+
+def recursive_minimax_move(game):
+    """The original 'minimax' move: a full `_minimax` recursion for every candidate cell."""
+    best_score, best_move = -float('inf'), None
+    for move in [i for i, v in enumerate(game.board) if v == 0]:
+        game.board[move] = 2
+        score = game._minimax(list(game.board), 0, False)
+        game.board[move] = 0
+        if score > best_score:
+            best_score, best_move = score, move
+    return best_move
+
+
+def make_q_table(entries, seed=0):
+    """Builds an RPS-style Q-table holding `entries` Q-values (3 actions per state)."""
+    rng = random.Random(seed)
+    actions = ('rock', 'paper', 'scissors')
+    return {f"s{i}": {a: rng.random() for a in actions} for i in range(entries // len(actions))}
+
+
+def core_import_time():
+    """
+    Imports the core modules in a fresh interpreter.
+    Returns:
+        float: Seconds spent importing them, as reported by -X importtime.
+    Raises:
+        RuntimeError: If importing them pulls in pygame or numpy.
+    """
+    code = f"import sys, {', '.join(CORE_MODULES)}; print(sorted({{'pygame', 'numpy'}} & set(sys.modules)))"
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    heavy = proc.stdout.strip()
+    if heavy != '[]':
+        raise RuntimeError(f"Core modules import {heavy}; keep them behind lazy imports")
+    total = 0
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"; top-level imports are not indented
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() in CORE_MODULES and not parts[2].startswith('  '):
+            total += int(parts[1])
+    return total / 1e6
+
+
+@benchmark('import')
+def bench_import(quick):
+    yield "import[core]", min(core_import_time() for _ in range(3))
+
+
+STARTUP_CODE = """
+import os, resource, sys, time
+os.environ['SDL_VIDEODRIVER'] = 'dummy'  # No window: the display is initialised off-screen
+import pygame
+start = time.perf_counter()
+from game import Game
+game = Game()
+game.current_scene.update()
+game.current_scene.draw(game.screen)
+pygame.display.flip()
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+
+@benchmark('startup')
+def bench_startup(quick):
+    """Time from importing Game to the first flipped frame, in a fresh interpreter (pygame import excluded)."""
+    runs = []
+    for _ in range(3):
+        proc = subprocess.run([sys.executable, '-c', STARTUP_CODE], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        seconds, rss = proc.stdout.split()[-2:]
+        runs.append((float(seconds), float(rss)))
+    INFO['startup.peak_rss_mb'] = min(rss for _, rss in runs)
+    yield "startup[first-frame]", min(seconds for seconds, _ in runs)
+
+
+DRAW_CODE = """
+import os, sys, time
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+import pygame
+import config
+from game import Game
+from ui import present
+game = Game()
+game.scenes.records = None  # Keep the benchmark's rounds out of the game-record log
+frames = int(sys.argv[1])
+for key in ('main_menu', 'ttt_select', 'ttt_minimax', 'rps_rl', 'c4_minimax', 'settings'):
+    scene = game.scenes[key]
+    if hasattr(scene, 'set_mode'):
+        scene.set_mode(key.split('_')[1])
+    if key == 'rps_rl':
+        scene.play('rock')  # Puts the result line on screen
+    elif hasattr(scene, 'message'):
+        scene.message = "Invalid Move: Cell not empty!"
+    for dirty_rects in (True, False):
+        config.DIRTY_RECTS = dirty_rects
+        present(scene.draw(game.screen))
+        start = time.perf_counter()
+        for _ in range(frames):
+            scene.draw(game.screen)
+        draw_time = (time.perf_counter() - start) / frames
+        start = time.perf_counter()
+        for _ in range(frames):
+            present(scene.draw(game.screen))
+        suffix = '' if dirty_rects else ',full'
+        print(f"draw[{key}{suffix}]", draw_time)
+        print(f"frame[{key}{suffix}]", (time.perf_counter() - start) / frames)
+
+from ui import render_text
+from utils import init_fonts
+font = init_fonts()[1]
+for key, render in (('text[uncached]', lambda: font.render("Score: You 3 | AI 5", True, (255, 255, 255))),
+                    ('text[cached]', lambda: render_text(font, "Score: You 3 | AI 5", (255, 255, 255)))):
+    start = time.perf_counter()
+    for _ in range(frames):
+        render()
+    print(key, (time.perf_counter() - start) / frames)
+"""
+
+
+@benchmark('draw', 'frame', 'text')
+def bench_draw(quick):
+    """
+    Per-frame cost of idle scenes (nothing changes between frames) off-screen:
+    `draw()` alone and `draw()` plus presenting the frame, with dirty rects and
+    with full redraws (",full"); and one HUD line of text.
+    """
+    proc = subprocess.run([sys.executable, '-c', DRAW_CODE, '100' if quick else '500'], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    for line in proc.stdout.splitlines():
+        key, seconds = line.split()
+        yield key, float(seconds)
+
+
+IDLE_CODE = """
+import asyncio, os, sys, time
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+import pygame
+from game import Game
+key, seconds = sys.argv[1], float(sys.argv[2])
+game = Game()
+game.navigate(key)
+scene = game.current_scene
+if key == 'ttt':
+    scene.message, scene.message_timer, scene.message_duration = "It's a Draw!", 1, 10 ** 9  # Keeps the scene active
+frames = 0
+draw = scene.draw
+def counted_draw(screen):
+    global frames
+    frames += 1
+    return draw(screen)
+scene.draw = counted_draw
+pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), loops=1)
+wall, cpu = time.perf_counter(), time.process_time()
+asyncio.run(game.run())
+wall = time.perf_counter() - wall
+print((time.process_time() - cpu) / wall * 100, frames / wall)
+"""
+
+
+@benchmark('loop')
+def bench_idle(quick):
+    """CPU use of the game loop on an idle menu, and its frame rate while a scene is active (dummy driver)."""
+    seconds = '1' if quick else '3'
+    for key, label in (('main_menu', 'idle'), ('ttt', 'active')):
+        proc = subprocess.run([sys.executable, '-c', IDLE_CODE, key, seconds], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        cpu_percent, fps = map(float, proc.stdout.split()[-2:])
+        INFO[f'loop.{label}.cpu_percent'] = cpu_percent
+        INFO[f'loop.{label}.fps'] = fps
+    return ()
+
+
+@benchmark('utils.check_win', 'connect4.check_win')
+def bench_check_win(quick):
+    rng = random.Random(0)
+    boards = [[rng.choice((0, 1, 2)) for _ in range(9)] for _ in range(1000)]
+    def run():
+        for board in boards:
+            check_win(board, 1)
+    yield "utils.check_win", per_call(run, len(boards))
+
+    positions = random_positions(Connect4, 30, 1000)
+    def run_c4():
+        for game in positions:
+            game.check_win(1)
+    yield "connect4.check_win", per_call(run_c4, len(positions))
+
+
+@benchmark('connect4.play')
+def bench_c4_play(quick):
+    records = random_c4_games(200 if quick else 1000)
+    plies = sum(len(cols) for cols in records)
+    yield "connect4.play", per_call(lambda: replay(Connect4, records), plies)
+    yield "connect4.play[list-baseline]", per_call(lambda: replay(ListConnect4, records), plies, repeat=1)
+
+
+@benchmark('connect_k')
+def bench_connect_k(quick):
+    """Connect-K on growing boards: moves checked from the last piece, against a full-board `check_win` scan."""
+    for rows, cols, k in ((6, 7, 4), (9, 10, 5), (20, 20, 5)):
+        make = lambda: ConnectK(rows, cols, k)
+        label = f"{rows}x{cols},k={k}"
+        records = random_c4_games(50 if quick else 200, make=make)
+        plies = sum(len(moves) for moves in records)
+        yield f"connect_k.play[{label}]", per_call(lambda: replay(make, records), plies)
+        positions = random_positions(make, rows * cols // 2, 200)
+        def run_scan():
+            for game in positions:
+                game.check_win(3 - game.current)
+        yield f"connect_k.check_win[{label}]", per_call(run_scan, len(positions))
+
+
+@benchmark('ttt.ai_move', 'c4.ai_move', 'rps.choose')
+def bench_ai_move(quick):
+    ttt.perfect_moves()  # Table build is timed separately in bench_ttt_minimax
+    table = load_q_table(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'q_table_ttt.json'))
+    positions = random_positions(lambda: TicTacToe(table), 6, 300)
+    for mode in ('naive', 'biassed', 'minimax', 'rl'):
+        def run():
+            for game in positions:
+                game.ai_move(mode)
+        yield f"ttt.ai_move[{mode}]", per_call(run, len(positions))
+
+    positions = random_positions(Connect4, 30, 300)
+    for mode in ('naive', 'biassed'):
+        def run_c4():
+            for game in positions:
+                game.ai_move(mode)
+        yield f"c4.ai_move[{mode}]", per_call(run_c4, len(positions))
+    searched = positions[:2 if quick else 6]
+    def run_search():
+        for game in searched:
+            game.ai_move('minimax')
+    yield "c4.ai_move[minimax]", per_call(run_search, len(searched), repeat=1)
+
+    book = open_book(os.path.join(os.path.dirname(os.path.abspath(__file__)), BOOK_FILE))
+    if book is not None:
+        openings = random_positions(Connect4, book.ply, 300)
+        for game in openings:
+            game.book = book
+        def run_book():
+            for game in openings:
+                game.ai_move('minimax')
+        yield "c4.ai_move[minimax,book]", per_call(run_book, len(openings))
+        unbooked = openings[:2 if quick else 6]
+        def run_unbooked():
+            for game in unbooked:
+                game.book = False  # The same openings, searched
+                game.ai_move('minimax')
+        yield "c4.ai_move[minimax,no-book]", per_call(run_unbooked, len(unbooked), repeat=1)
+        book.close()
+
+    rps = RPS({})
+    for mode in ('naive', 'biased', 'rl', 'meta'):
+        def run_rps():
+            for _ in range(1000):
+                rps.choose(mode)
+        yield f"rps.choose[{mode}]", per_call(run_rps, 1000)
+
+
+@benchmark('c4.playout', 'c4.ai_move[mcts]', 'mcts')
+def bench_mcts(quick):
+    """MCTS playout cost: one Python `play()` loop per game against batched NumPy playouts, and a full move."""
+    import numpy as np  # Loaded here, after the import case
+    from mcts import MCTSSearch, random_playouts
+    rng = random.Random(0)
+    game = Connect4()
+    count = 100 if quick else 500
+    def run_python():
+        for _ in range(count):
+            game.new_round()
+            result = None
+            while result is None:
+                result = game.play(rng.choice(game.valid_moves()))
+    yield "c4.playout[python]", per_call(run_python, count, repeat=1)
+
+    np_rng = np.random.default_rng(0)
+    for batch in (64, 1024):
+        def run_batched():
+            for _ in range(max(1, 2048 // batch)):
+                random_playouts(0, 0, batch, np_rng)
+        yield f"c4.playout[numpy,batch={batch}]", per_call(run_batched, max(1, 2048 // batch) * batch, repeat=1)
+
+    search = MCTSSearch(time_limit=None, max_playouts=2000 if quick else 10000, seed=0)
+    start = time.perf_counter()
+    search.best_move(0, 0)
+    yield "c4.ai_move[mcts]", time.perf_counter() - start
+    INFO['mcts.playouts_per_second'] = search.playouts_per_second
+
+
+@benchmark('c4.ntuple', 'c4.ai_move[rl]')
+def bench_ntuple(quick):
+    """N-tuple network: value of one position, a full rl move and TD self-play throughput."""
+    from ntuple import NTupleNetwork, open_network, NETWORK_FILE  # Loaded here, after the import case
+    network = open_network(os.path.join(os.path.dirname(os.path.abspath(__file__)), NETWORK_FILE)) or NTupleNetwork.create()
+    positions = random_positions(Connect4, 12, 300)
+    boards = [[cell for row in game.board for cell in row] for game in positions]
+    def run_evaluate():
+        network.evaluate(boards)
+    yield "c4.ntuple.evaluate[batch=300]", per_call(run_evaluate, len(boards))
+    def run_single():
+        for board in boards[:100]:
+            network.evaluate(board)
+    yield "c4.ntuple.evaluate[single]", per_call(run_single, 100)
+    for game in positions:
+        game.network = network
+    def run_move():
+        for game in positions:
+            game.ai_move('rl')
+    yield "c4.ai_move[rl]", per_call(run_move, len(positions))
+
+    games = 2000 if quick else 10000
+    trainee = NTupleNetwork.create()
+    start = time.perf_counter()
+    trainee.train_self_play(games, seed=0)
+    elapsed = time.perf_counter() - start
+    yield "c4.ntuple.self_play_game", elapsed / games
+    INFO['c4.ntuple.self_play_games_per_second'] = games / elapsed
+
+
+@benchmark('ttt.batch', 'c4.batch')
+def bench_batch_env(quick):
+    """Batched environments: one `step` of N games with random legal moves, for N from 1 to 100,000."""
+    import numpy as np  # Loaded here, after the import case
+    from batch_env import BatchTicTacToe, BatchConnect4, random_legal
+    sizes = (1, 1000) if quick else (1, 1000, 100000)
+    for name, env_cls in (("ttt", BatchTicTacToe), ("c4", BatchConnect4)):
+        for n in sizes:
+            env = env_cls(n)
+            rng = np.random.default_rng(0)
+            steps = max(5, (20000 if quick else 100000) // n)
+            actions = [random_legal(env.reset(), rng)]
+            def run():
+                for _ in range(steps):
+                    _, _, legal = env.step(actions[0])
+                    actions[0] = random_legal(legal, rng)
+            seconds = per_call(run, steps, repeat=1)
+            yield f"{name}.batch_step[n={n}]", seconds
+            INFO[f'{name}.batch_env[n={n}].steps_per_second'] = n / seconds
+
+
+@benchmark('ttt._minimax', 'ttt.perfect_moves', 'ttt.minimax_move')
+def bench_ttt_minimax(quick):
+    game = TicTacToe({})
+    yield "ttt._minimax[full-solve]", per_call(lambda: game._minimax([0] * 9, 0, False), 1, repeat=1)
+    def build():
+        ttt._perfect_moves = None
+        ttt.perfect_moves()
+    yield "ttt.perfect_moves[build]", per_call(build, 1)
+    game.play(0)
+    yield "ttt.minimax_move[recursion]", per_call(lambda: recursive_minimax_move(game), 1, repeat=1)
+
+
+@benchmark('rps.play')
+def bench_rps_play(quick):
+    rng = random.Random(0)
+    lengths = (10, 1000) if quick else (10, 1000, 100000)
+    for mode in ('naive', 'biased', 'rl', 'meta'):
+        for length in lengths:
+            game = RPS({})
+            for _ in range(length):
+                game.play(rng.choice(RPS_CHOICES), mode)
+            choices = [rng.choice(RPS_CHOICES) for _ in range(2000)]
+            def run():
+                for choice in choices:
+                    game.play(choice, mode)
+            yield f"rps.play[{mode},history={length}]", per_call(run, len(choices), repeat=1)
+
+
+@benchmark('save_q_table', 'load_q_table', 'q_table.lookup')
+def bench_qtable_io(quick, large=False):
+    sizes = (10 ** 3,) if quick else (10 ** 3, 10 ** 5)
+    if large:
+        sizes += (10 ** 7,)
+    with tempfile.TemporaryDirectory() as folder:
+        for entries in sizes:
+            table = make_q_table(entries)
+            probes = random.Random(1).sample(list(table), min(1000, len(table)))
+            for fmt in ('json', 'qtb'):
+                path = os.path.join(folder, f"table.{fmt}")
+                yield f"save_q_table[{fmt},{entries}]", per_call(lambda: save_q_table(table, path), 1, repeat=1)
+                start = time.perf_counter()
+                loaded = load_q_table(path)
+                yield f"load_q_table[{fmt},{entries}]", time.perf_counter() - start
+                def lookup():
+                    for state in probes:
+                        loaded[state]['rock']
+                yield f"q_table.lookup[{fmt},{entries}]", per_call(lookup, len(probes), repeat=1)
+                if hasattr(loaded, 'close'):
+                    loaded.close()
+                del loaded
+            del table
+
+
+@benchmark('q_table.mark_dirty', 'q_table.checkpoint')
+def bench_checkpoint(quick):
+    """Q-table checkpoints: the game thread's cost of marking a changed row, and one background checkpoint."""
+    from persistence import QTableStore
+    with tempfile.TemporaryDirectory() as folder:
+        store = QTableStore(interval=None)
+        store.FILES = {game: os.path.join(folder, name) for game, name in QTableStore.FILES.items()}
+        save_q_table(load_q_table(os.path.join(os.path.dirname(os.path.abspath(__file__)), QTableStore.FILES['ttt'])),
+                     store.FILES['ttt'])
+        table = store.get('ttt')
+        states = list(table)
+        yield "q_table.mark_dirty[ttt]", per_call(lambda: [table.dirty.add(state) for state in states], len(states))
+        for changed in (10, len(states)):
+            def checkpoint():
+                table.dirty.update(states[:changed])
+                store.checkpoint()
+            yield f"q_table.checkpoint[ttt,{changed} rows]", per_call(checkpoint, 1)
+
+
+@benchmark('game_log')
+def bench_game_log(quick):
+    """Game-record log: encoding a round, buffering it (as a scene does) and streaming it back."""
+    from game_log import GameLog, encode_record, read_records
+    games = random_c4_games(2000 if quick else 20000)
+    yield "game_log.encode[c4]", per_call(lambda: [encode_record('c4', ('human', 'minimax'), 1, g) for g in games], len(games))
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "records.bin")
+        log = GameLog(path)
+        def record():
+            for g in games:
+                log.record('c4', ('human', 'minimax'), 1, g)
+        yield "game_log.record[c4]", per_call(record, len(games), repeat=1)
+        start = time.perf_counter()
+        log.close()
+        yield "game_log.close", time.perf_counter() - start
+        INFO['game_log.bytes_per_c4_record'] = os.path.getsize(path) / len(games)
+        yield "game_log.read[c4]", per_call(lambda: sum(1 for _ in read_records(path)), len(games))
+
+
+@benchmark('profiler')
+def bench_profiler(quick):
+    """Cost of the profiler's bookkeeping: one recorded timing, and reading every percentile for the overlay."""
+    from profiler import Profiler
+    profiler = Profiler(enabled=True)
+    samples = [random.Random(0).lognormvariate(-7, 1) for _ in range(10000 if quick else 100000)]
+    def add():
+        for seconds in samples:
+            profiler.add('frame.draw', seconds)
+    yield "profiler.add", per_call(add, len(samples))
+    for name in ('frame.handle_event', 'frame.update', 'frame.flip', 'frame.total', 'ai_move[Connect4,mcts]'):
+        profiler.add(name, 0.001)
+    yield "profiler.summary[6]", per_call(lambda: [profiler.summary() for _ in range(100)], 100)
+
+
+def run_suite(quick=False, large=False, pattern=None):
+    """Runs the registered cases (those that can match `pattern`) and returns {name: seconds per operation}."""
+    results = {}
+    for case in BENCHMARKS:
+        if not selected(case, pattern):
+            continue
+        items = case(quick, large) if case is bench_qtable_io else case(quick)
+        for name, seconds in items:
+            if pattern and pattern not in name:
+                continue
+            results[name] = seconds
+            print(f"{name:<40} {format_seconds(seconds):>12}", flush=True)
+    for name, value in INFO.items():
+        print(f"{name:<40} {value:>12.1f}")
+    return results
+
+
+def format_seconds(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def to_json(results):
+    """Wraps results in the stable output layout (sorted names, fixed keys)."""
+    return {
+        'schema': SCHEMA_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'unit': 'seconds per operation',
+        'results': {name: results[name] for name in sorted(results)},
+        'info': {name: INFO[name] for name in sorted(INFO)},
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints the change of every result against a baseline run.
+    Returns:
+        list: Names of results slower than the baseline by more than `tolerance` (a fraction).
+    """
+    regressions = []
+    print(f"\n{'benchmark':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        old, new = baseline[name], results[name]
+        change = new / old - 1 if old else 0.0
+        flag = ''
+        if change > tolerance:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<40} {format_seconds(old):>12} {format_seconds(new):>12} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite for the AI Game Suite.")
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--baseline', help="compare against results saved with --json")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before a result counts as a regression")
+    parser.add_argument('--filter', help="only run the cases that can report a result whose name contains this text, and report just those")
+    parser.add_argument('--quick', action='store_true', help="fewer iterations and sizes")
+    parser.add_argument('--large', action='store_true', help="include the 10^7-entry Q-table case")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.quick, args.large, args.filter)
+    status = 0
+    if results.get('import[core]', 0) > IMPORT_BUDGET:
+        print(f"\nCore import took {format_seconds(results['import[core]'])}, over the {format_seconds(IMPORT_BUDGET)} budget")
+        status = 1
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(to_json(results), f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}: {', '.join(regressions)}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
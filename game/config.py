@@ -3,7 +3,14 @@ import sys
 
 # Constants
 FPS = 60
+IDLE_WAIT_MS = 250  # Longest the loop sleeps waiting for input while nothing on screen is changing
 WIDTH, HEIGHT = 800, 600
+THINKING_DELAY_MS = 100  # AI replies quicker than this are played without showing "AI is thinking..."
+PROFILE = False  # Record frame and AI timings from the start and save them at quit; F3 shows them either way
+PROFILE_KEY = pygame.K_F3  # Shows or hides the profile overlay
+EXPORT_KEY = pygame.K_F4   # Saves the profile as JSON (as CSV with Shift)
+CHECKPOINT_SECONDS = 30  # Changed Q-tables are saved in the background this often (None: only at quit)
+DIRTY_RECTS = True  # Redraw and update only what changed each frame; False redraws and flips every frame
 BG_COLOR = (30, 30, 30)
 BUTTON_COLOR = (100, 100, 100)
 BUTTON_HOVER = (150, 150, 150)
@@ -25,12 +32,32 @@ C4_P2_COLOR = (255, 255, 0) # Yellow
 FONT_LARGE = "freesansbold.ttf"
 FONT_SMALL = "freesansbold.ttf"
 
+# Process-wide font cache: every scene shares one Font per (file, size)
+_font_cache = {}
+
+def load_font(file, size):
+    """
+    Returns the font for a file and size, loading it only the first time it is asked for.
+    Args:
+        file (str): Font file name, or None for pygame's default font.
+        size (int): Point size.
+    Returns:
+        pygame.font.Font: The shared font object.
+    """
+    key = (file, size)
+    font = _font_cache.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _font_cache[key] = pygame.font.Font(file, size)
+    return font
+
 # Initialize fonts
 def init_fonts():
     try:
-        font_large = pygame.font.Font(FONT_LARGE, int(HEIGHT * 0.05))
-        font_medium = pygame.font.Font(FONT_SMALL, int(HEIGHT * 0.035))
-        font_small = pygame.font.Font(FONT_SMALL, int(HEIGHT * 0.025))
+        font_large = load_font(FONT_LARGE, int(HEIGHT * 0.05))
+        font_medium = load_font(FONT_SMALL, int(HEIGHT * 0.035))
+        font_small = load_font(FONT_SMALL, int(HEIGHT * 0.025))
         return font_large, font_medium, font_small
     except FileNotFoundError:
         print("Error: Font file not found. Ensure 'freesansbold.ttf' is in the same directory.")
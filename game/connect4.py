@@ -1,39 +1,140 @@
 import random
+import time
 
 # Constants for Connect 4
 ROWS = 6
 COLS = 7
 
-class Connect4:
+# --- Bitboard layout ---
+# Each column uses ROWS + 1 bits; bit (col * COL_STRIDE + r) is the cell `r` rows
+# up from the bottom of `col`. The extra sentinel bit on top of every column stays
+# empty, so shifting a mask never carries a line over from one column into the next.
+COL_STRIDE = ROWS + 1
+BOTTOM_MASK = sum(1 << (c * COL_STRIDE) for c in range(COLS))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROWS) - 1)
+# Shift distances for the four line directions: vertical, horizontal and both diagonals
+DIRECTIONS = (1, COL_STRIDE, COL_STRIDE - 1, COL_STRIDE + 1)
+
+
+def has_four(mask):
+    """
+    Checks whether a player's bitboard contains four in a row in any direction.
+    Args:
+        mask (int): The player's bitboard.
+    Returns:
+        bool: True if the mask holds a connected line of four.
+    """
+    for shift in DIRECTIONS:
+        pairs = mask & (mask >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+def winning_positions(pos, mask):
+    """
+    Finds the empty cells that would complete a line of four for the owner of `pos`.
+    Args:
+        pos (int): The player's bitboard.
+        mask (int): Bitboard of every occupied cell.
+    Returns:
+        int: Bitboard of the empty cells that win on the spot (reachable or not).
+    """
+    # Vertical: three stacked pieces directly below the cell
+    result = (pos << 1) & (pos << 2) & (pos << 3)
+    for shift in DIRECTIONS[1:]:
+        pair = (pos << shift) & (pos << (2 * shift))
+        result |= pair & (pos << (3 * shift))
+        result |= pair & (pos >> shift)
+        pair = (pos >> shift) & (pos >> (2 * shift))
+        result |= pair & (pos << shift)
+        result |= pair & (pos >> (3 * shift))
+    return result & (BOARD_MASK ^ mask)
+
+
+def _cell_weights():
+    """Groups cells by how many lines of four pass through them; central cells score highest."""
+    counts = [0] * (COLS * COL_STRIDE)
+    for shift in DIRECTIONS:
+        for start in range(COLS * COL_STRIDE):
+            line = sum(1 << (start + i * shift) for i in range(4))
+            if line & BOARD_MASK == line:
+                for i in range(4):
+                    counts[start + i * shift] += 1
+    weights = {}
+    for bit, count in enumerate(counts):
+        if count:
+            weights[count] = weights.get(count, 0) | (1 << bit)
+    return tuple(weights.items())
+
+
+# Bitboard of all cells in each column
+COLUMN_MASKS = tuple(((1 << ROWS) - 1) << (c * COL_STRIDE) for c in range(COLS))
+# (weight, cell mask) pairs used by the static evaluation of the search
+CELL_WEIGHTS = _cell_weights()
+# Columns searched first: the centre takes part in the most lines
+MOVE_ORDER = sorted(range(COLS), key=lambda c: abs(COLS // 2 - c))
+
+
+def bit_to_cell(bit):
+    """Converts a bitboard index to the (row, col) used by `Connect4.board` (row 0 is the top)."""
+    col, r = divmod(bit, COL_STRIDE)
+    return (ROWS - 1 - r, col)
+
+
+class ConnectK:
     """
-    Implements the Connect 4 game logic.
+    Implements Connect-K on a board of any size: players drop pieces into
+    columns and the first to line up `k` in a row, column or diagonal wins.
     Supports player moves and AI moves (naive, biased).
+    Only lines through the newest piece can have been completed, so a move is
+    checked by counting the mover's pieces outward from it in four directions,
+    O(k) whatever the board size. `heights` holds the pieces in each column, so
+    placing a piece and listing moves never scan the board.
     """
-    def __init__(self, qtable=None): # qtable is a placeholder for a future RL agent
-        self.board = [[0] * COLS for _ in range(ROWS)] # 0: empty, 1: player 1, 2: player 2 (AI)
-        self.current = 1      # Current player: 1 for human, 2 for AI
+    # (row, col) steps of the four line directions; row 0 is the top
+    LINES = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+    def __init__(self, rows=ROWS, cols=COLS, k=4, qtable=None):
+        """
+        Args:
+            rows (int): Board height.
+            cols (int): Board width.
+            k (int): Pieces in a line needed to win.
+            qtable (dict): Unused; kept for the scenes' engine signature.
+        """
+        if rows < 1 or cols < 1 or not 1 < k <= max(rows, cols):
+            raise ValueError(f"no line of {k} fits on a {rows}x{cols} board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
         self.qtable = qtable
-        self.game_over = False
         self.score = [0, 0]   # [Player 1 Score, Player 2 (AI) Score]
+        self._clear_board()
+
+    def _clear_board(self):
+        """Empties the board and hands the first move to player 1."""
+        self.board = [[0] * self.cols for _ in range(self.rows)] # 0: empty, 1: player 1, 2: player 2 (AI)
+        self.heights = [0] * self.cols  # Number of pieces in each column
+        self.moves = 0        # Pieces on the board
+        self.history = []     # Columns played this round, in order
+        self.current = 1      # Current player: 1 for human, 2 for AI
+        self.game_over = False
 
     def reset(self):
         """Resets the game board, state, and score for a new game."""
-        self.board = [[0] * COLS for _ in range(ROWS)]
-        self.current = 1
-        self.game_over = False
+        self._clear_board()
         self.score = [0, 0]
 
     def new_round(self):
         """Resets the board and state for a new round, preserving the score."""
-        self.board = [[0] * COLS for _ in range(ROWS)]
-        self.current = 1
-        self.game_over = False
+        self._clear_board()
 
     def play(self, col):
         """
         Processes a player's move by dropping a piece in a column.
         Args:
-            col (int): The column (0-6) where the player wants to move.
+            col (int): The column (0-based) where the player wants to move.
         Returns:
             tuple or None:
                 - (player, win_combo) if a player wins.
@@ -43,30 +144,65 @@ class Connect4:
         if self.game_over or not self.is_valid_location(col):
             return None
 
-        row = self.get_next_open_row(col)
-        self.board[row][col] = self.current
+        row = self.rows - 1 - self.heights[col]
+        self._place(row, col)
 
-        win_combo = self.check_win(self.current)
+        # Only lines through the new piece can have been completed by this move
+        win_combo = self._winning_line(row, col)
         if win_combo:
             self.game_over = True
             return (self.current, win_combo)
 
-        if all(self.board[0][c] != 0 for c in range(COLS)): # Board is full
+        if self.moves == self.rows * self.cols: # Board is full
             self.game_over = True
             return (0, None) # It's a draw
 
         self.current = 3 - self.current # Switch player
         return None
 
+    def _place(self, row, col):
+        """Puts a piece of the player to move on (row, col), the lowest empty cell of `col`."""
+        self.board[row][col] = self.current
+        self.heights[col] += 1
+        self.moves += 1
+        self.history.append(col)
+
+    def _run(self, row, col, dr, dc, player):
+        """Counts `player`'s pieces in a line from (row, col), not including it, stepping by (dr, dc); at most k - 1."""
+        board, rows, cols = self.board, self.rows, self.cols
+        count = 0
+        r, c = row + dr, col + dc
+        while count < self.k - 1 and 0 <= r < rows and 0 <= c < cols and board[r][c] == player:
+            count += 1
+            r += dr
+            c += dc
+        return count
+
+    def _line_through(self, row, col, player):
+        """
+        Finds a line of k for `player` through (row, col), counting that cell as theirs.
+        Returns:
+            list: The (row, col) cells of the line (up to 2k - 1 of them), else None.
+        """
+        for dr, dc in self.LINES:
+            back = self._run(row, col, -dr, -dc, player)
+            ahead = self._run(row, col, dr, dc, player)
+            if back + 1 + ahead >= self.k:
+                return [(row + i * dr, col + i * dc) for i in range(-back, ahead + 1)]
+        return None
+
+    def _winning_line(self, row, col):
+        """Finds a line completed by the piece just played on (row, col)."""
+        return self._line_through(row, col, self.current)
+
     def is_valid_location(self, col):
         """Checks if a column has an open spot."""
-        return self.board[0][col] == 0
+        return 0 <= col < self.cols and self.heights[col] < self.rows
 
     def get_next_open_row(self, col):
         """Finds the lowest open row in a given column."""
-        for r in range(ROWS - 1, -1, -1):
-            if self.board[r][col] == 0:
-                return r
+        if self.heights[col] < self.rows:
+            return self.rows - 1 - self.heights[col]
         return None
 
     def check_win(self, player):
@@ -75,37 +211,28 @@ class Connect4:
         Returns:
             list: A list of (row, col) tuples for the winning line, else None.
         """
-        # Check horizontal locations for a win
-        for c in range(COLS - 3):
-            for r in range(ROWS):
-                if all(self.board[r][c+i] == player for i in range(4)):
-                    return [(r, c+i) for i in range(4)]
-        # Check vertical locations for a win
-        for c in range(COLS):
-            for r in range(ROWS - 3):
-                if all(self.board[r+i][c] == player for i in range(4)):
-                    return [(r+i, c) for i in range(4)]
-        # Check positively sloped diagonals
-        for c in range(COLS - 3):
-            for r in range(ROWS - 3):
-                if all(self.board[r+i][c+i] == player for i in range(4)):
-                    return [(r+i, c+i) for i in range(4)]
-        # Check negatively sloped diagonals
-        for c in range(COLS - 3):
-            for r in range(3, ROWS):
-                if all(self.board[r-i][c+i] == player for i in range(4)):
-                    return [(r-i, c+i) for i in range(4)]
+        for r, row in enumerate(self.board):
+            for c, val in enumerate(row):
+                if val == player:
+                    for dr, dc in self.LINES:
+                        if self._run(r, c, dr, dc, player) == self.k - 1:
+                            return [(r + i * dr, c + i * dc) for i in range(self.k)]
         return None
 
+    def wins_with(self, player, col):
+        """Checks whether dropping a piece for `player` in `col` would complete a line."""
+        return self._line_through(self.rows - 1 - self.heights[col], col, player) is not None
+
     def valid_moves(self):
         """Returns a list of columns that are not full."""
-        return [c for c in range(COLS) if self.is_valid_location(c)]
+        return [c for c in range(self.cols) if self.heights[c] < self.rows]
 
-    def ai_move(self, mode):
+    def ai_move(self, mode, stop=None):
         """
         Determines the AI's move based on the selected mode.
         Args:
-            mode (str): The AI difficulty ('naive', 'biassed').
+            mode (str): The AI difficulty ('naive', 'biassed'; Connect4 adds the search and learned modes).
+            stop (threading.Event): When set, a search in progress gives up early.
         Returns:
             int: The chosen column for the AI's move.
         """
@@ -115,32 +242,322 @@ class Connect4:
 
         if mode == 'naive':
             return random.choice(moves)
-        
+
         elif mode == 'biassed':
-            # Check if AI can win in the next move
+            # Check if AI (the side to move) can win in the next move
             for col in moves:
-                row = self.get_next_open_row(col)
-                self.board[row][col] = 2 # Try the move for AI
-                if self.check_win(2):
-                    self.board[row][col] = 0 # Undo move
+                if self.wins_with(self.current, col):
                     return col
-                self.board[row][col] = 0 # Undo move
-            
+
             # Check if player can win in the next move, and block them
             for col in moves:
-                row = self.get_next_open_row(col)
-                self.board[row][col] = 1 # Try the move for player
-                if self.check_win(1):
-                    self.board[row][col] = 0 # Undo move
+                if self.wins_with(3 - self.current, col):
                     return col
-                self.board[row][col] = 0 # Undo move
 
             # Otherwise, prefer the center column
-            center_col = COLS // 2
+            center_col = self.cols // 2
             if center_col in moves:
                 return center_col
-            
+
             # As a fallback, take a random valid move
             return random.choice(moves)
-            
+
         return random.choice(moves) # Default for any other mode
+
+
+class Connect4(ConnectK):
+    """
+    Implements the Connect 4 game logic: Connect-K on the standard 6x7 board.
+    Supports player moves and AI moves (naive, biased, minimax, mcts, rl).
+    The position is also held as one bitboard per player, which the search and
+    learned modes work on and which finds wins with a few shifts.
+    """
+    def __init__(self, qtable=None): # qtable is unused: no table covers Connect 4, the rl mode uses ntuple.py
+        self.search = None    # Alpha-beta searcher, created on the first 'minimax' move
+        self.book = None      # Opening book, opened on the first 'minimax' move (False if there is none)
+        self.mcts = None      # Monte Carlo tree searcher, created on the first 'mcts' move
+        self.network = None   # N-tuple value network, read on the first 'rl' move
+        super().__init__(ROWS, COLS, 4, qtable)
+
+    def _clear_board(self):
+        super()._clear_board()
+        self.bitboards = [0, 0]      # Occupied cells of player 1 and player 2
+
+    @property
+    def mask(self):
+        """Bitboard of every occupied cell."""
+        return self.bitboards[0] | self.bitboards[1]
+
+    def _place(self, row, col):
+        self.bitboards[self.current - 1] |= 1 << (col * COL_STRIDE + self.heights[col])
+        super()._place(row, col)
+
+    def _winning_line(self, row, col):
+        """
+        Finds a line of four in the mover's bitboard that passes through the new piece.
+        Returns:
+            list: The (row, col) cells of the line, else None.
+        """
+        mask = self.bitboards[self.current - 1]
+        bit = col * COL_STRIDE + ROWS - 1 - row
+        for shift in DIRECTIONS:
+            pairs = mask & (mask >> shift)
+            starts = pairs & (pairs >> (2 * shift)) # Bit set where a line of four begins
+            if not starts:
+                continue
+            for k in range(4):
+                start = bit - k * shift
+                if start >= 0 and (starts >> start) & 1:
+                    return [bit_to_cell(start + i * shift) for i in range(4)]
+        return None
+
+    def check_win(self, player):
+        """
+        Checks the entire board for a winning combination for the given player.
+        Returns:
+            list: A list of (row, col) tuples for the winning line, else None.
+        """
+        mask = self.bitboards[player - 1]
+        for shift in DIRECTIONS:
+            pairs = mask & (mask >> shift)
+            starts = pairs & (pairs >> (2 * shift))
+            if starts:
+                start = (starts & -starts).bit_length() - 1 # Lowest set bit
+                return [bit_to_cell(start + i * shift) for i in range(4)]
+        return None
+
+    def wins_with(self, player, col):
+        """Checks whether dropping a piece for `player` in `col` would complete a line."""
+        bit = col * COL_STRIDE + self.heights[col]
+        return has_four(self.bitboards[player - 1] | (1 << bit))
+
+    def ai_move(self, mode, stop=None):
+        """
+        Determines the AI's move based on the selected mode.
+        Args:
+            mode (str): The AI difficulty ('naive', 'biassed', 'minimax', 'mcts', 'rl').
+            stop (threading.Event): When set, a search in progress gives up early.
+        Returns:
+            int: The chosen column for the AI's move.
+        """
+        if self.moves == ROWS * COLS:
+            return None
+
+        if mode == 'minimax':
+            pos, mask = self.bitboards[self.current - 1], self.mask
+            if self.book is None:
+                from opening_book import open_book  # Imported here: the book module builds on this one
+                self.book = open_book() or False
+            if self.book:
+                entry = self.book.probe(pos, mask)
+                if entry is not None:
+                    return entry[0]
+            # The searcher (and its transposition table) is kept across moves and rounds
+            if self.search is None:
+                self.search = Connect4Search()
+            return self.search.best_move(pos, mask, stop)
+
+        elif mode == 'mcts':
+            # The tree is kept between moves; NumPy is only loaded for this mode
+            if self.mcts is None:
+                from mcts import MCTSSearch
+                self.mcts = MCTSSearch()
+            return self.mcts.best_move(self.bitboards[self.current - 1], self.mask, stop)
+
+        elif mode == 'rl':
+            # Trained weights come from c4_ntuple.bin; without it the network is untrained
+            if self.network is None:
+                from ntuple import open_network, NTupleNetwork
+                self.network = open_network() or NTupleNetwork.create()
+            return self.network.best_move(self.board, self.heights, self.bitboards[self.current - 1], self.mask, self.current)
+
+        return super().ai_move(mode, stop)
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the per-move time or node budget runs out, or it is stopped."""
+
+
+class Connect4Search:
+    """
+    Negamax search with alpha-beta pruning for Connect 4.
+    Positions are (pos, mask) bitboard pairs where `pos` holds the pieces of the
+    player to move. Iterative deepening keeps the best move of the last completed
+    depth, so a move is always ready when the time or node budget runs out.
+    """
+    WIN_SCORE = 100000    # Score of a win on the spot; faster wins score higher
+    EXACT, LOWER, UPPER = 0, 1, 2
+
+    def __init__(self, time_limit=0.15, max_nodes=None, table_size=1 << 18):
+        """
+        Args:
+            time_limit (float): Seconds allowed per move (None for no limit).
+            max_nodes (int): Nodes allowed per move (None for no limit).
+            table_size (int): Number of transposition table slots.
+        """
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.table_size = table_size
+        # Each slot holds (key, depth, score, flag, best_col) or None; a new entry
+        # for the same slot always replaces the old one
+        self.table = [None] * table_size
+        self.nodes = 0
+        self.depth_reached = 0
+        self.best_score = 0  # Score of the last move chosen, for the player who made it
+        self._deadline = None
+        self._stop = None
+
+    def clear(self):
+        """Empties the transposition table."""
+        self.table = [None] * self.table_size
+
+    def best_move(self, pos, mask, stop=None):
+        """
+        Picks a column for the player to move by iterative deepening.
+        Args:
+            pos (int): Bitboard of the pieces of the player to move.
+            mask (int): Bitboard of every occupied cell.
+            stop (threading.Event): When set, the search ends as if its budget had run out.
+        Returns:
+            int: The chosen column, or None if the board is full.
+        """
+        moves = [c for c in MOVE_ORDER if not mask & (1 << (c * COL_STRIDE + ROWS - 1))]
+        if not moves:
+            return None
+        played = mask.bit_count()
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        # Take a win on the spot without searching
+        wins = winning_positions(pos, mask) & possible
+        if wins:
+            self.best_score = self.WIN_SCORE - played - 1
+            return (wins.bit_length() - 1) // COL_STRIDE
+
+        self.nodes = 0
+        self.depth_reached = 0
+        self._deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+        self._stop = stop
+        best_col = moves[0]
+        self.best_score = 0
+        for depth in range(1, ROWS * COLS - played + 1):
+            try:
+                score, col = self._search_root(pos, mask, played, depth)
+            except SearchTimeout:
+                break
+            best_col, self.best_score = col, score
+            self.depth_reached = depth
+            if abs(score) >= self.WIN_SCORE - ROWS * COLS:
+                break # The result is proven, deeper searches cannot change it
+        return best_col
+
+    def _search_root(self, pos, mask, played, depth):
+        """Searches every root move to `depth` and returns (score, col) of the best one."""
+        alpha, beta = -self.WIN_SCORE, self.WIN_SCORE
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        best_score, best_col = -self.WIN_SCORE - 1, None
+        for col in self._ordered_moves(pos, mask, self._table_move(pos + mask)):
+            move_bit = possible & COLUMN_MASKS[col]
+            score = -self._negamax(pos ^ mask, mask | move_bit, played + 1, depth - 1, -beta, -alpha)
+            if score > best_score:
+                best_score, best_col = score, col
+            alpha = max(alpha, score)
+        self._store(pos + mask, depth, best_score, self.EXACT, best_col)
+        return best_score, best_col
+
+    def _negamax(self, pos, mask, played, depth, alpha, beta):
+        """
+        Scores a position from the point of view of the player to move.
+        Returns:
+            int: The score, exact when it lies strictly between alpha and beta.
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            if self._deadline is not None and time.perf_counter() > self._deadline:
+                raise SearchTimeout()
+            if self.max_nodes is not None and self.nodes >= self.max_nodes:
+                raise SearchTimeout()
+            if self._stop is not None and self._stop.is_set():
+                raise SearchTimeout()
+
+        if played == ROWS * COLS:
+            return 0 # Draw
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        if winning_positions(pos, mask) & possible:
+            return self.WIN_SCORE - played - 1
+        if depth == 0:
+            return self._evaluate(pos, mask)
+
+        # Cells where the opponent would win next: these must be blocked, and the
+        # cell just below them must not be filled
+        threats = winning_positions(pos ^ mask, mask)
+        forced = threats & possible
+        if forced & (forced - 1):
+            return -(self.WIN_SCORE - played - 2) # Two threats cannot both be blocked
+        safe = (forced or possible) & ~(threats >> 1)
+        if not safe:
+            return -(self.WIN_SCORE - played - 2)
+
+        key = pos + mask
+        alpha_orig = alpha
+        entry = self.table[key % self.table_size]
+        table_col = None
+        if entry is not None and entry[0] == key:
+            table_col = entry[4]
+            if entry[1] >= depth:
+                score, flag = entry[2], entry[3]
+                if flag == self.EXACT:
+                    return score
+                if flag == self.LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        best_score, best_col = -self.WIN_SCORE - 1, None
+        for col in self._ordered_moves(pos, mask, table_col):
+            move_bit = possible & COLUMN_MASKS[col]
+            if not move_bit & safe:
+                continue
+            score = -self._negamax(pos ^ mask, mask | move_bit, played + 1, depth - 1, -beta, -alpha)
+            if score > best_score:
+                best_score, best_col = score, col
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+
+        if best_score <= alpha_orig:
+            flag = self.UPPER
+        elif best_score >= beta:
+            flag = self.LOWER
+        else:
+            flag = self.EXACT
+        self._store(key, depth, best_score, flag, best_col)
+        return best_score
+
+    def _ordered_moves(self, pos, mask, first=None):
+        """Yields the playable columns, the table's best move first and then centre-first."""
+        if first is not None:
+            yield first
+        for col in MOVE_ORDER:
+            if col != first and not mask & (1 << (col * COL_STRIDE + ROWS - 1)):
+                yield col
+
+    def _evaluate(self, pos, mask):
+        """Static score: central cells held plus open cells that would complete a line."""
+        opp = pos ^ mask
+        score = 0
+        for weight, cells in CELL_WEIGHTS:
+            score += weight * ((pos & cells).bit_count() - (opp & cells).bit_count())
+        score += 20 * (winning_positions(pos, mask).bit_count() - winning_positions(opp, mask).bit_count())
+        return score
+
+    def _table_move(self, key):
+        """Returns the best column stored for `key`, if any."""
+        entry = self.table[key % self.table_size]
+        if entry is not None and entry[0] == key:
+            return entry[4]
+        return None
+
+    def _store(self, key, depth, score, flag, col):
+        self.table[key % self.table_size] = (key, depth, score, flag, col)
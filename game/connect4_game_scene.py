@@ -1,15 +1,26 @@
 import pygame
-from ui import Button
-from connect4 import Connect4
-from config import WIDTH, HEIGHT, BG_COLOR, WHITE, GRID_COLOR, BORDER_COLOR, C4_P1_COLOR, C4_P2_COLOR, HIGHLIGHT, MESSAGE_BG
+from ui import Button, DirtyCanvas
+from ai_worker import AIMove
+from connect4 import Connect4, ROWS, COLS
+from config import WIDTH, HEIGHT, THINKING_DELAY_MS, BG_COLOR, GRID_COLOR, C4_P1_COLOR, C4_P2_COLOR, HIGHLIGHT
 from utils import init_fonts
 
 class Connect4GameScene:
-    def __init__(self, q_table):
-        self.game = Connect4(q_table)
-        self.cell_size = 70
-        self.grid_width = 7 * self.cell_size
-        self.grid_height = 6 * self.cell_size
+    def __init__(self, q_table, game=None, records=None):
+        """
+        Args:
+            q_table (dict): Q-table handed to the Connect4 engine.
+            game (ConnectK): Engine to play on instead of standard Connect 4; the grid is sized from it.
+            records (GameLog): Log each finished round is appended to (None for no log). Only
+                standard 6x7 Connect 4 is logged, as the log holds no board size.
+        """
+        self.game = game if game is not None else Connect4(q_table)
+        self.records = records if (self.game.rows, self.game.cols, self.game.k) == (ROWS, COLS, 4) else None
+        # Cells are up to 70 px, smaller when the engine's board would not fit between the score and the buttons
+        self.cell_size = min(70, (WIDTH - 40) // self.game.cols, (HEIGHT - 180) // self.game.rows)
+        self.grid_width = self.game.cols * self.cell_size
+        self.grid_height = self.game.rows * self.cell_size
+        self.radius = self.cell_size // 2 - max(1, self.cell_size // 14)
         self.grid_x = (WIDTH - self.grid_width) // 2
         self.grid_y = (HEIGHT - self.grid_height) // 2 + 20
         self.message = ""
@@ -19,11 +30,38 @@ class Connect4GameScene:
         self.font_medium = font_medium
         self.font_small = font_small
         self.buttons = [
-            Button(50, HEIGHT - 70, 100, 50, "Back", font_medium, lambda: 'main_menu'),
+            Button(50, HEIGHT - 70, 100, 50, "Back", font_medium, self.leave),
             Button(WIDTH - 150, HEIGHT - 70, 100, 50, "Reset", font_medium, lambda: self.reset())
         ]
+        self.canvas = DirtyCanvas(self.draw_static)
+        self.pending = None  # AIMove computing the AI's reply
+        self.pending_since = 0
+
+    def set_mode(self, mode):
+        """Selects the AI mode; the scene is shared by all modes, so switching starts a fresh game."""
+        if mode != self.mode:
+            self.reset()
+        self.mode = mode
+        if self.game.current == 2 and not self.game.game_over and self.pending is None:
+            self.start_ai_move()  # Resume the reply abandoned by leaving the scene
+
+    def start_ai_move(self):
+        """Starts the AI's reply in the background; update() plays it once it is ready."""
+        self.pending = AIMove(self.game, self.mode)
+        self.pending_since = pygame.time.get_ticks()
+
+    def cancel_ai_move(self):
+        """Abandons the AI's reply, if one is being computed."""
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+
+    def leave(self):
+        self.cancel_ai_move()
+        return 'main_menu'
 
     def reset(self):
+        self.cancel_ai_move()
         self.game.reset()
         self.message = ""
         self.highlight = []
@@ -31,11 +69,13 @@ class Connect4GameScene:
 
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-            return 'main_menu'
+            return self.leave()
         for button in self.buttons:
             result = button.check_click(event)
             if result is not None:
                 return result
+        if self.pending is not None:
+            return None  # The board is the AI's until its move is played
         if event.type == pygame.MOUSEBUTTONDOWN:
             x, _ = event.pos
             if self.grid_x < x < self.grid_x + self.grid_width:
@@ -49,17 +89,15 @@ class Connect4GameScene:
                     if res:
                         self.handle_game_end(res)
                     else:
-                        ai_move = self.game.ai_move(self.mode)
-                        if ai_move is not None:
-                            res2 = self.game.play(ai_move)
-                            if res2:
-                                self.handle_game_end(res2)
+                        self.start_ai_move()
                 else:
                     self.message = "Invalid Move: Column is full!"
         return None
 
     def handle_game_end(self, result):
         player_won, combo = result
+        if self.records is not None:
+            self.records.record('c4', ('human', self.mode), player_won, self.game.history)
         self.highlight = combo if combo else []
         if player_won == 0:
             self.message = "It's a Draw! Click a column to play again."
@@ -70,38 +108,50 @@ class Connect4GameScene:
             else:
                 self.game.score[1] += 1
 
-    def update(self):
-        pass
-
-    def draw(self, screen):
-        screen.fill(BG_COLOR)
-        score_surface = self.font_medium.render(f"Score: You {self.game.score[0]} | AI {self.game.score[1]}", True, WHITE)
-        score_rect = score_surface.get_rect(center=(WIDTH // 2, self.grid_y - 40))
-        screen.blit(score_surface, score_rect)
+    def is_active(self):
+        """True while the AI is thinking, so the game loop keeps ticking until its move is in."""
+        return self.pending is not None
 
-        pygame.draw.rect(screen, GRID_COLOR, (self.grid_x, self.grid_y, self.grid_width, self.grid_height), border_radius=10)
+    def update(self):
+        if self.pending is not None and self.pending.done():
+            ai_move = self.pending.result()
+            self.pending = None
+            if ai_move is not None:
+                res = self.game.play(ai_move)
+                if res:
+                    self.handle_game_end(res)
 
-        for r in range(6):
-            for c in range(7):
-                color = BG_COLOR
-                if self.game.board[r][c] == 1:
-                    color = C4_P1_COLOR
-                elif self.game.board[r][c] == 2:
-                    color = C4_P2_COLOR
-                pygame.draw.circle(screen, color, (self.grid_x + c * self.cell_size + self.cell_size // 2,
-                                                   self.grid_y + r * self.cell_size + self.cell_size // 2), self.cell_size // 2 - 5)
+    def draw_static(self, surface):
+        """Draws the layer that never changes: background, grid and empty holes."""
+        surface.fill(BG_COLOR)
+        pygame.draw.rect(surface, GRID_COLOR, (self.grid_x, self.grid_y, self.grid_width, self.grid_height), border_radius=10)
+        for r in range(self.game.rows):
+            for c in range(self.game.cols):
+                pygame.draw.circle(surface, BG_COLOR, self.cell_rect(r, c).center, self.radius)
 
-        for r, c in self.highlight:
-            pygame.draw.circle(screen, HIGHLIGHT, (self.grid_x + c * self.cell_size + self.cell_size // 2,
-                                                   self.grid_y + r * self.cell_size + self.cell_size // 2), self.cell_size // 2 - 5, 5)
+    def cell_rect(self, r, c):
+        return pygame.Rect(self.grid_x + c * self.cell_size, self.grid_y + r * self.cell_size, self.cell_size, self.cell_size)
 
-        pos = pygame.mouse.get_pos()
-        for button in self.buttons:
-            hover = button.rect.collidepoint(pos)
-            button.draw(screen, hover)
+    def draw_cell(self, screen, r, c, val, highlighted):
+        rect = self.cell_rect(r, c)
+        if val:
+            pygame.draw.circle(screen, C4_P1_COLOR if val == 1 else C4_P2_COLOR, rect.center, self.radius)
+        if highlighted:
+            pygame.draw.circle(screen, HIGHLIGHT, rect.center, self.radius, max(1, self.cell_size // 14))
 
-        if self.message:
-            message_surface = self.font_small.render(self.message, True, WHITE)
-            message_rect = message_surface.get_rect(center=(WIDTH // 2, HEIGHT - 100))
-            pygame.draw.rect(screen, MESSAGE_BG, message_rect.inflate(20, 10), border_radius=5)
-            screen.blit(message_surface, message_rect)
\ No newline at end of file
+    def draw(self, screen):
+        """Draws the frame, redrawing only the cells and widgets that changed; returns the dirty rects."""
+        canvas = self.canvas
+        canvas.begin(screen)
+        canvas.text('score', self.font_medium, f"Score: You {self.game.score[0]} | AI {self.game.score[1]}",
+                    (WIDTH // 2, self.grid_y - 40))
+        if self.pending is not None and pygame.time.get_ticks() - self.pending_since >= THINKING_DELAY_MS:
+            canvas.text('thinking', self.font_small, "AI is thinking...", (WIDTH // 2, self.grid_y - 15))
+        for r, row in enumerate(self.game.board):
+            for c, val in enumerate(row):
+                highlighted = (r, c) in self.highlight
+                canvas.piece((r, c), (val, highlighted), self.cell_rect(r, c),
+                             lambda s, r=r, c=c, val=val, highlighted=highlighted: self.draw_cell(s, r, c, val, highlighted))
+        canvas.buttons(self.buttons)
+        canvas.message('message', self.font_small, self.message, (WIDTH // 2, HEIGHT - 100), (20, 10))
+        return canvas.end()
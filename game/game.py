@@ -1,86 +1,178 @@
+import asyncio
+import os
+import platform
+import time
 import pygame
-from main_menu_scene import MainMenuScene
-from settings_scene import SettingsScene
-from mode_select_scene import ModeSelectScene
-from ttt_game_scene import TTTGameScene
-from rps_game_scene import RPSGameScene
-from connect4_game_scene import Connect4GameScene
-from config import WIDTH, HEIGHT
-from persistence import load_q_table, save_q_table
+import config
+from config import WIDTH, HEIGHT, FPS, IDLE_WAIT_MS, CHECKPOINT_SECONDS, PROFILE_KEY, EXPORT_KEY, init_fonts
+from persistence import QTableStore
+from game_log import GameLog
+from profiler import PROFILER, PROFILE_FILE
+from scene_registry import SceneRegistry
+from ui import present, invalidate_screen, ProfileOverlay
+
+# In the browser the loop must hand control back every frame, so it never blocks on events
+BLOCKING_WAIT = platform.system() != "Emscripten"
 
 class Game:
     def __init__(self):
         pygame.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("AI Game Suite")
-        self.q_table_ttt = load_q_table('q_table_ttt.json')
-        self.q_table_rps = load_q_table('q_table_rps.json')
-        self.q_table_c4 = load_q_table('q_table_c4.json')
-        self.scenes = {
-            'main_menu': MainMenuScene(),
-            'settings': SettingsScene(),
-            'ttt_select': ModeSelectScene('ttt'),
-            'rps_select': ModeSelectScene('rps'),
-            'c4_select': ModeSelectScene('c4'),
-            'ttt_naive': TTTGameScene(self.q_table_ttt),
-            'ttt_biassed': TTTGameScene(self.q_table_ttt),
-            'ttt_minimax': TTTGameScene(self.q_table_ttt),
-            'rps_naive': RPSGameScene(self.q_table_rps),
-            'rps_biassed': RPSGameScene(self.q_table_rps),
-            'rps_rl': RPSGameScene(self.q_table_rps),
-            'c4_naive': Connect4GameScene(self.q_table_c4),
-            'c4_biassed': Connect4GameScene(self.q_table_c4)
-        }
+        self.q_tables = QTableStore(CHECKPOINT_SECONDS)  # Loaded when their game is first opened, checkpointed as they change
+        self.records = GameLog()       # Finished rounds, written in batches off the frame loop
+        self.scenes = SceneRegistry(self.q_tables, self.records)  # Scenes are built on first navigation
         self.current_scene = self.scenes['main_menu']
+        self.clock = pygame.time.Clock()
+        self.running = True
+        self.profiler = PROFILER
+        self.profiler.enabled = config.PROFILE
+        self.overlay = None  # ProfileOverlay while it is shown
+
+    def is_active(self):
+        """Returns True while the current scene has a timer, animation or AI move pending."""
+        return getattr(self.current_scene, 'is_active', lambda: False)()
+
+    async def next_events(self):
+        """
+        Waits for the events of the next frame.
+        While the scene is active this ticks at FPS; when it is idle it sleeps
+        until an event arrives or IDLE_WAIT_MS passes, so static screens cost
+        next to no CPU.
+        Returns:
+            list: The pending events, possibly empty.
+        """
+        if self.is_active():
+            self.clock.tick(FPS)
+            await asyncio.sleep(0)  # Let other tasks run once per frame
+        elif BLOCKING_WAIT:
+            await asyncio.sleep(0)
+            event = pygame.event.wait(IDLE_WAIT_MS)
+            self.clock.tick()  # Restart the frame timer so the next active frame is not cut short
+            if event.type != pygame.NOEVENT:
+                return [event] + pygame.event.get()
+        else:
+            await asyncio.sleep(1.0 / FPS)
+        return pygame.event.get()
+
+    def navigate(self, target):
+        """
+        Switches to the scene a handler returned.
+        Args:
+            target (str | tuple): A scene key, or (game_type, mode) for a game scene.
+        """
+        if isinstance(target, tuple):
+            game_type, mode = target
+            self.current_scene = self.scenes[f"{game_type}_{mode}"]
+            if hasattr(self.current_scene, 'set_mode'):
+                self.current_scene.set_mode(mode)
+        elif target in self.scenes:
+            self.current_scene = self.scenes[target]
+
+    async def run(self):
+        """Runs the game until the window is closed or Quit is chosen."""
+        present(self.current_scene.draw(self.screen))
+        while self.running:
+            events = await self.next_events()
+            if self.profiler.enabled:
+                self.profiled_frame(events)
+            else:
+                self.frame(events)
+
+        self.quit_game()
+        pygame.quit()
+
+    def handle_events(self, events):
+        """Passes a frame's events to the current scene and follows the scene it returns."""
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
+                return
+            if event.type == pygame.VIDEOEXPOSE:
+                invalidate_screen()  # The window contents were lost: redraw the next frame in full
+            if event.type == pygame.KEYDOWN and event.key in (PROFILE_KEY, EXPORT_KEY):
+                self.handle_profile_key(event)
+                continue
+            next_scene_info = self.current_scene.handle_event(event)
+            if next_scene_info is not None:
+                self.navigate(next_scene_info)
+
+        # Check should_quit flag for MainMenuScene
+        if getattr(self.current_scene, 'should_quit', False):
+            self.running = False
+
+    def frame(self, events):
+        """Runs one frame: events, update, draw and present."""
+        self.handle_events(events)
+        if not self.running:
+            return
+        self.current_scene.update()
+        present(self.current_scene.draw(self.screen))
+
+    def profiled_frame(self, events):
+        """Runs one frame like `frame`, recording the time of each stage and drawing the overlay."""
+        clock = time.perf_counter
+        start = clock()
+        self.handle_events(events)
+        if not self.running:
+            return
+        handled = clock()
+        self.current_scene.update()
+        updated = clock()
+        dirty = self.current_scene.draw(self.screen)
+        drawn = clock()
+        if self.overlay is not None:
+            dirty = self.overlay.draw(self.screen, dirty)
+        overlaid = clock()
+        present(dirty)
+        end = clock()
+        add = self.profiler.add
+        add('frame.handle_event', handled - start)
+        add('frame.update', updated - handled)
+        add('frame.draw', drawn - updated)
+        add('frame.flip', end - overlaid)
+        add('frame.total', end - start)
+
+    def handle_profile_key(self, event):
+        """
+        F3 shows or hides the profile overlay, recording timings while it is shown
+        (always, if config.PROFILE is set); F4 exports the figures to
+        PROFILE_FILE, or as CSV with Shift held.
+        """
+        if event.key == PROFILE_KEY:
+            if self.overlay is None:
+                self.overlay = ProfileOverlay(self.profiler, init_fonts()[2])
+                self.profiler.enabled = True
+            else:
+                self.overlay = None
+                self.profiler.enabled = config.PROFILE
+                invalidate_screen()  # Wipe the overlay off the next frame
+        else:
+            filename = PROFILE_FILE
+            if event.mod & pygame.KMOD_SHIFT:
+                filename = os.path.splitext(filename)[0] + '.csv'
+            self.export_profile(filename)
+
+    def export_profile(self, filename=PROFILE_FILE):
+        """Writes the profiler's figures, reporting rather than raising on failure."""
+        try:
+            self.profiler.export(filename)
+            print(f"Saved profile to {filename}")
+        except OSError as e:
+            print(f"Error saving profile: {e}")
 
     def quit_game(self):
         """
-        Saves Q-tables and prepares the game for clean exit.
+        Saves Q-tables, writes the buffered game records (and, with config.PROFILE
+        set, the profile) and prepares the game for clean exit.
         """
         try:
-            save_q_table(self.q_table_ttt, 'q_table_ttt.json')
-            save_q_table(self.q_table_rps, 'q_table_rps.json')
-            save_q_table(self.q_table_c4, 'q_table_c4.json')
+            self.q_tables.save()
         except Exception as e:
             print(f"Error saving Q-tables: {e}")
+        self.records.close()
+        if config.PROFILE:
+            self.export_profile()
 
 if __name__ == "__main__":
-    import asyncio
-    async def run_game():
-        game = Game()
-        clock = pygame.time.Clock()
-        running = True
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    game.quit_game()
-                    running = False
-                    break
-                next_scene_info = game.current_scene.handle_event(event)
-                if next_scene_info is not None:
-                    if isinstance(next_scene_info, tuple):
-                        game_type, mode = next_scene_info
-                        scene_key = f"{game_type}_{mode}"
-                        game.current_scene = game.scenes[scene_key]
-                        if hasattr(game.current_scene, 'mode'):
-                            game.current_scene.mode = mode
-                    elif next_scene_info in game.scenes:
-                        game.current_scene = game.scenes[next_scene_info]
-                    elif next_scene_info is None and hasattr(game.current_scene, 'should_quit') and game.current_scene.should_quit:
-                        game.quit_game()
-                        running = False
-                        break
-
-            if hasattr(game.current_scene, 'should_quit') and game.current_scene.should_quit:
-                game.quit_game()
-                running = False
-                break
-
-            game.current_scene.update()
-            game.current_scene.draw(game.screen)
-            pygame.display.flip()
-            clock.tick(60)
-            await asyncio.sleep(1.0 / 60)
-        pygame.quit()
-
-    asyncio.run(run_game())
\ No newline at end of file
+    asyncio.run(Game().run())
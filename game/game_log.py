@@ -0,0 +1,193 @@
+"""
+Game records: every finished round is appended to a compact binary log.
+Records are encoded when a round ends and buffered; full batches are written
+by a background thread, so the frame loop never waits on the disk. The reader
+memory-maps the log and yields one record at a time, so logs of millions of
+games can be scanned or replayed without loading them.
+Only the standard library is used.
+"""
+import mmap
+import os
+import platform
+import struct
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Log format ---
+# A header (magic, version), then records back to back. A record is a varint
+# byte length followed by:
+#   game        uint8 index into GAMES
+#   modes       uint8 indices into MODES of player 1 and player 2
+#   winner      uint8: 0 for a draw, else the winning player (1 or 2)
+#   timestamp   varint milliseconds since the Unix epoch
+#   moves       varint count, then one varint per move: a cell (TTT), a column
+#               (Connect 4) or, for RPS, two per throw, player 1's choice then
+#               player 2's as indices into RPS_CHOICES (a record may hold many
+#               throws, its winner being the side that won more of them)
+# GAMES and MODES are only ever appended to, so old logs stay readable.
+LOG_MAGIC = b'GRL1'
+LOG_VERSION = 1
+LOG_FILE = 'game_records.bin'
+_HEADER = struct.Struct('<4sHxx')
+GAMES = ('ttt', 'rps', 'c4')
+MODES = ('human', 'naive', 'biassed', 'biased', 'minimax', 'mcts', 'rl', 'meta')
+# Other spellings of a mode, stored as (and read back as) the mode they name;
+# code 3 ('biased') is only found in logs written before the alias
+MODE_ALIASES = {'biased': 'biassed'}
+
+# The browser build has no threads: there batches are written on the spot
+THREADED = platform.system() != "Emscripten"
+
+GameRecord = namedtuple('GameRecord', 'game modes winner timestamp moves')
+GameRecord.__doc__ = "One finished round: game name, (player 1 mode, player 2 mode), winner, timestamp in ms and moves."
+
+def _varint(value, out):
+    """Appends `value` (a non-negative int) to `out` as a little-endian base-128 varint."""
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, pos):
+    """Decodes the varint at data[pos]; returns (value, position after it)."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def encode_record(game, modes, winner, moves, timestamp=None):
+    """
+    Encodes one round as a length-prefixed record.
+    Args:
+        game (str): One of GAMES.
+        modes (tuple): (player 1 mode, player 2 mode), each one of MODES or MODE_ALIASES.
+        winner (int): 0 for a draw, else 1 or 2.
+        moves (list): The moves as small non-negative ints (see the format above).
+        timestamp (int): Milliseconds since the epoch (None for now).
+    Returns:
+        bytes: The record.
+    """
+    mode1, mode2 = (MODE_ALIASES.get(mode, mode) for mode in modes)
+    body = bytearray((GAMES.index(game), MODES.index(mode1), MODES.index(mode2), winner))
+    _varint(int(time.time() * 1000) if timestamp is None else timestamp, body)
+    _varint(len(moves), body)
+    for move in moves:
+        _varint(move, body)
+    record = bytearray()
+    _varint(len(body), record)
+    return bytes(record + body)
+
+class GameLog:
+    """
+    Appends records to a log file in batches.
+    `record` only encodes and buffers. A batch is handed to a background writer
+    thread, which appends it with one write, as soon as FLUSH_RECORDS records
+    are waiting; a timer thread hands over whatever has waited FLUSH_SECONDS,
+    so a crash loses at most that much play. `close` writes whatever is left.
+    """
+    FLUSH_RECORDS = 64
+    FLUSH_SECONDS = 5.0
+
+    def __init__(self, filename=LOG_FILE):
+        self.filename = filename
+        self._buffer = bytearray()
+        self._pending = 0             # Records in the buffer
+        self._lock = threading.Lock() # Guards the buffer, shared with the timer thread
+        self._stop = threading.Event()
+        self._timer = None            # Timer thread, started by the first record
+        self._executor = None         # One writer thread, started by the first threaded flush
+
+    def record(self, game, modes, winner, moves, timestamp=None):
+        """Buffers one finished round; see `encode_record` for the arguments."""
+        self.append_encoded(encode_record(game, modes, winner, moves, timestamp))
+
+    def append_encoded(self, data, count=1):
+        """Buffers `count` records already encoded with `encode_record`."""
+        with self._lock:
+            self._buffer += data
+            self._pending += count
+            full = self._pending >= self.FLUSH_RECORDS
+        if full:
+            self.flush()
+        if THREADED and self._timer is None:
+            self._timer = threading.Thread(target=self._run, name='game-log-timer', daemon=True)
+            self._timer.start()
+
+    def _run(self):
+        while not self._stop.wait(self.FLUSH_SECONDS):
+            self.flush()
+
+    def flush(self):
+        """Hands the buffered records to the writer (written on the spot without threads)."""
+        with self._lock:
+            if not self._buffer:
+                return
+            data, self._buffer, self._pending = bytes(self._buffer), bytearray(), 0
+            if THREADED:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='game-log')
+                self._executor.submit(self._write, data)  # One worker, submitted to in order: batches land in order
+                return
+        self._write(data)
+
+    def _write(self, data):
+        try:
+            new = not os.path.exists(self.filename) or os.path.getsize(self.filename) == 0
+            with open(self.filename, 'ab') as f:
+                if new:
+                    f.write(_HEADER.pack(LOG_MAGIC, LOG_VERSION))
+                f.write(data)
+        except OSError as e:
+            print(f"Error writing game records to {self.filename}: {e}")
+
+    def close(self):
+        """Stops the timer, writes every buffered record and waits for the writer to finish."""
+        if self._timer is not None:
+            self._stop.set()
+            self._timer.join()
+            self._timer = None
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+def read_records(filename=LOG_FILE):
+    """
+    Streams the records of a log, oldest first, through a memory map.
+    A record cut short at the end of the file (a write interrupted by a crash)
+    ends the stream.
+    Args:
+        filename (str): The log to read.
+    Yields:
+        GameRecord: One record at a time.
+    """
+    if not os.path.exists(filename) or os.path.getsize(filename) < _HEADER.size:
+        return
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, version = _HEADER.unpack_from(data)
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            raise ValueError(f"{filename} is not a version {LOG_VERSION} game log")
+        pos, size = _HEADER.size, len(data)
+        while pos < size:
+            try:
+                length, start = _read_varint(data, pos)
+            except IndexError:
+                return
+            pos = start + length
+            if pos > size:
+                return
+            game, mode1, mode2, winner = data[start:start + 4]
+            timestamp, at = _read_varint(data, start + 4)
+            count, at = _read_varint(data, at)
+            moves = []
+            for _ in range(count):
+                move, at = _read_varint(data, at)
+                moves.append(move)
+            modes = tuple(MODE_ALIASES.get(MODES[mode], MODES[mode]) for mode in (mode1, mode2))
+            yield GameRecord(GAMES[game], modes, winner, timestamp, moves)
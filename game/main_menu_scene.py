@@ -1,5 +1,5 @@
 import pygame
-from ui import Button
+from ui import Button, DirtyCanvas, render_text
 from config import WIDTH, HEIGHT, BG_COLOR, WHITE, init_fonts
 
 class MainMenuScene:
@@ -18,8 +18,9 @@ class MainMenuScene:
             Button(button_x, button_y_start + 3 * button_spacing, button_width, button_height, "Settings", font_medium, lambda: 'settings'),
             Button(WIDTH - 120, HEIGHT - 70, 100, 50, "Quit", font_medium, lambda: self.quit_app())
         ]
-        self.title_surface = font_large.render("AI Game Suite", True, WHITE)
+        self.title_surface = render_text(font_large, "AI Game Suite", WHITE)
         self.title_rect = self.title_surface.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 220))
+        self.canvas = DirtyCanvas(self.draw_static)
         self.should_quit = False
 
     def quit_app(self):
@@ -39,10 +40,13 @@ class MainMenuScene:
     def update(self):
         pass
 
+    def draw_static(self, surface):
+        """Draws the layer that never changes: background and title."""
+        surface.fill(BG_COLOR)
+        surface.blit(self.title_surface, self.title_rect)
+
     def draw(self, screen):
-        screen.fill(BG_COLOR)
-        screen.blit(self.title_surface, self.title_rect)
-        pos = pygame.mouse.get_pos()
-        for button in self.buttons:
-            hover = button.rect.collidepoint(pos)
-            button.draw(screen, hover)
\ No newline at end of file
+        """Draws the frame, redrawing only the buttons whose hover state changed; returns the dirty rects."""
+        self.canvas.begin(screen)
+        self.canvas.buttons(self.buttons)
+        return self.canvas.end()
@@ -0,0 +1,189 @@
+"""
+Monte Carlo tree search for Connect 4.
+The tree is grown with UCT; each new leaf is scored by a batch of random
+playouts that advance together as NumPy arrays of bitboards, one array
+operation per ply for the whole batch.
+"""
+import math
+import time
+import numpy as np
+from connect4 import ROWS, COLS, COL_STRIDE, BOTTOM_MASK, BOARD_MASK, COLUMN_MASKS, DIRECTIONS, MOVE_ORDER, \
+    has_four, winning_positions
+
+_COLUMNS = np.array(COLUMN_MASKS, dtype=np.uint64)
+_BOTTOM = np.uint64(BOTTOM_MASK)
+_BOARD = np.uint64(BOARD_MASK)
+
+
+def has_four_batch(masks):
+    """Vectorised `has_four`: a bool array, True where a bitboard holds four in a row."""
+    found = np.zeros(masks.shape, dtype=bool)
+    for shift in DIRECTIONS:
+        pairs = masks & (masks >> np.uint64(shift))
+        found |= (pairs & (pairs >> np.uint64(2 * shift))) != 0
+    return found
+
+
+def random_playouts(pos, mask, n, rng):
+    """
+    Plays `n` uniformly random games to the end from one position, all at once.
+    Args:
+        pos (int): Bitboard of the pieces of the player to move.
+        mask (int): Bitboard of every occupied cell.
+        n (int): Number of playouts.
+        rng (numpy.random.Generator): Source of the random moves.
+    Returns:
+        tuple: (wins, draws) counted for the player to move.
+    """
+    pos = np.full(n, pos, dtype=np.uint64)
+    mask = np.full(n, mask, dtype=np.uint64)
+    wins = losses = 0
+    mover_is_root = True  # Whether the player to move is the one the counts are for
+    for _ in range(ROWS * COLS - int(mask[0]).bit_count()):
+        possible = (mask + _BOTTOM) & _BOARD
+        moves = possible[:, None] & _COLUMNS  # The playable cell of each column, or 0 when it is full
+        col = np.argmax(rng.random(moves.shape) * (moves != 0), axis=1)
+        move = moves[np.arange(len(col)), col]
+        won = has_four_batch(pos | move)
+        finished = int(np.count_nonzero(won))
+        if mover_is_root:
+            wins += finished
+        else:
+            losses += finished
+        if finished:
+            going = ~won
+            pos, mask, move = pos[going], mask[going], move[going]
+            if not len(pos):
+                break
+        pos, mask = pos ^ mask, mask | move  # The opponent moves next
+        mover_is_root = not mover_is_root
+    return wins, n - wins - losses
+
+
+class Node:
+    """A position in the search tree, reached by `col`; statistics are for the player who played it."""
+    __slots__ = ('pos', 'mask', 'children', 'untried', 'visits', 'score', 'result')
+
+    def __init__(self, pos, mask, result=None):
+        self.pos = pos            # Pieces of the player to move
+        self.mask = mask
+        self.children = {}        # col -> Node
+        # Columns not expanded yet, popped from the end so the centre comes first
+        self.untried = [] if result is not None else \
+            [c for c in reversed(MOVE_ORDER) if not mask & (1 << (c * COL_STRIDE + ROWS - 1))]
+        self.visits = 0
+        self.score = 0.0          # Wins plus half the draws, for the player who moved into this node
+        self.result = result      # 1.0 (the move into this node won) or 0.5 (it filled the board), else None
+
+    def expand(self, col):
+        """Adds and returns the child reached by playing `col`."""
+        move_bit = (self.mask + BOTTOM_MASK) & COLUMN_MASKS[col]
+        mask = self.mask | move_bit
+        if has_four(self.pos | move_bit):
+            result = 1.0
+        elif mask == BOARD_MASK:
+            result = 0.5
+        else:
+            result = None
+        child = self.children[col] = Node(self.pos ^ self.mask, mask, result)
+        return child
+
+
+class MCTSSearch:
+    """
+    UCT search with batched random playouts. The tree is kept between moves:
+    when the next position is a child or grandchild of the last root, its
+    subtree becomes the new root.
+    """
+    EXPLORATION = 1.4  # UCT exploration constant, on the win-rate scale
+
+    def __init__(self, time_limit=0.5, max_playouts=None, batch=64, seed=None):
+        """
+        Args:
+            time_limit (float): Seconds allowed per move (None for no limit).
+            max_playouts (int): Playouts allowed per move (None for no limit).
+            batch (int): Playouts run together for each new leaf.
+            seed (int): Seed for the playouts' random moves.
+        """
+        if time_limit is None and max_playouts is None:
+            raise ValueError("MCTSSearch needs a time limit or a playout budget")
+        self.time_limit = time_limit
+        self.max_playouts = max_playouts
+        self.batch = batch
+        self.rng = np.random.default_rng(seed)
+        self.root = None
+        self.playouts = 0    # Playouts run for the last move
+        self.elapsed = 0.0   # Seconds spent on the last move
+
+    @property
+    def playouts_per_second(self):
+        """Playout rate of the last move."""
+        return self.playouts / self.elapsed if self.elapsed else 0.0
+
+    def _find_root(self, pos, mask):
+        """Returns the kept node for the position, searching two plies below the last root, or a new node."""
+        if self.root is not None:
+            level = [self.root]
+            for _ in range(3):
+                for node in level:
+                    if node.pos == pos and node.mask == mask:
+                        return node
+                level = [child for node in level for child in node.children.values()]
+        return Node(pos, mask)
+
+    def best_move(self, pos, mask, stop=None):
+        """
+        Picks a column for the player to move.
+        Args:
+            pos (int): Bitboard of the pieces of the player to move.
+            mask (int): Bitboard of every occupied cell.
+            stop (threading.Event): When set, the search ends as if its budget had run out.
+        Returns:
+            int: The most visited column, or None if the board is full.
+        """
+        self.playouts = 0
+        self.elapsed = 0.0
+        root = self.root = self._find_root(pos, mask)
+        if not root.untried and not root.children:
+            return None
+        wins = winning_positions(pos, mask) & (mask + BOTTOM_MASK) & BOARD_MASK
+        if wins:
+            return (wins.bit_length() - 1) // COL_STRIDE  # Take a win on the spot
+
+        start = time.perf_counter()
+        deadline = start + self.time_limit if self.time_limit else None
+        while True:
+            self._iterate(root)
+            if self.max_playouts is not None and self.playouts >= self.max_playouts:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if stop is not None and stop.is_set():
+                break
+        self.elapsed = time.perf_counter() - start
+        return max(root.children, key=lambda col: root.children[col].visits)
+
+    def _iterate(self, root):
+        """Selects a leaf by UCT, expands it, scores it with one batch of playouts and backs the result up."""
+        node, path = root, [root]
+        while node.result is None and not node.untried:
+            log_visits = math.log(node.visits)
+            c = self.EXPLORATION
+            node = max(node.children.values(),
+                       key=lambda ch: ch.score / ch.visits + c * math.sqrt(log_visits / ch.visits))
+            path.append(node)
+        if node.result is None:
+            node = node.expand(node.untried.pop())
+            path.append(node)
+
+        n = self.batch
+        if node.result is not None:
+            score = node.result * n
+        else:
+            wins, draws = random_playouts(node.pos, node.mask, n, self.rng)
+            score = (n - wins - draws) + 0.5 * draws  # The player to move at the leaf is the opponent of its mover
+            self.playouts += n
+        for visited in reversed(path):
+            visited.visits += n
+            visited.score += score
+            score = n - score
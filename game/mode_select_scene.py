@@ -1,37 +1,44 @@
 import pygame
-from ui import Button
+from ui import Button, DirtyCanvas, render_text
 from config import WIDTH, HEIGHT, BG_COLOR, WHITE, init_fonts
 
 class ModeSelectScene:
     def __init__(self, game_type):
         self.game_type = game_type
-        font_large, font_medium, _ = init_fonts()
+        font_large, font_medium, font_small = init_fonts()
         button_width = 200
         button_height = 50
         button_spacing = 20
 
         if game_type == 'ttt':
-            modes = [("Easy (Naive)", 'naive'), ("Medium (Heuristic)", 'biassed'), ("Hard (Minimax)", 'minimax')]
+            modes = [("Easy (Naive)", 'naive'), ("Medium (Heuristic)", 'biassed'), ("Hard (Minimax)", 'minimax'), ("Adaptive (RL)", 'rl')]
         elif game_type == 'rps':
-            modes = [("Easy (Naive)", 'naive'), ("Medium (Biased)", 'biassed'), ("Hard (RL)", 'rl')]
+            modes = [("Easy (Naive)", 'naive'), ("Medium (Biased)", 'biassed'), ("Hard (RL)", 'rl'), ("Expert (Meta)", 'meta')]
         elif game_type == 'c4':
-            modes = [("Easy (Naive)", 'naive'), ("Medium (Heuristic)", 'biassed')]
+            modes = [("Easy (Naive)", 'naive'), ("Medium (Heuristic)", 'biassed'), ("Hard (Minimax)", 'minimax'), ("Expert (MCTS)", 'mcts'), ("Learned (N-tuple)", 'rl')]
         else:
             modes = []
 
+        label_font = font_medium
+        if len(modes) > 3:
+            # Narrower buttons so every mode fits on one row
+            button_width = min(180, (WIDTH - 20 - (len(modes) - 1) * button_spacing) // len(modes))
+            if any(font_medium.size(text)[0] > button_width for text, _ in modes):
+                label_font = font_small # Labels too long for the narrower buttons
         total_width = len(modes) * button_width + (len(modes) - 1) * button_spacing
         start_x = (WIDTH - total_width) // 2
         start_y = HEIGHT // 2
 
         self.buttons = []
         for i, (text, mode) in enumerate(modes):
-            self.buttons.append(Button(start_x + i * (button_width + button_spacing), start_y, button_width, button_height, text, font_medium, lambda m=mode: (self.game_type, m)))
+            self.buttons.append(Button(start_x + i * (button_width + button_spacing), start_y, button_width, button_height, text, label_font, lambda m=mode: (self.game_type, m)))
 
         back_button_x = (WIDTH - button_width) // 2
         self.buttons.append(Button(back_button_x, start_y + button_height + button_spacing, button_width, button_height, "Back", font_medium, lambda: 'main_menu'))
 
-        self.title_surface = font_large.render(f"Select {self.game_type.upper()} Mode", True, WHITE)
+        self.title_surface = render_text(font_large, f"Select {self.game_type.upper()} Mode", WHITE)
         self.title_rect = self.title_surface.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100))
+        self.canvas = DirtyCanvas(self.draw_static)
 
     def handle_event(self, event):
         for button in self.buttons:
@@ -43,10 +50,13 @@ class ModeSelectScene:
     def update(self):
         pass
 
+    def draw_static(self, surface):
+        """Draws the layer that never changes: background and title."""
+        surface.fill(BG_COLOR)
+        surface.blit(self.title_surface, self.title_rect)
+
     def draw(self, screen):
-        screen.fill(BG_COLOR)
-        screen.blit(self.title_surface, self.title_rect)
-        pos = pygame.mouse.get_pos()
-        for button in self.buttons:
-            hover = button.rect.collidepoint(pos)
-            button.draw(screen, hover)
\ No newline at end of file
+        """Draws the frame, redrawing only the buttons whose hover state changed; returns the dirty rects."""
+        self.canvas.begin(screen)
+        self.canvas.buttons(self.buttons)
+        return self.canvas.end()
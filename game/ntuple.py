@@ -0,0 +1,259 @@
+"""
+N-tuple network for Connect 4: a value function that sums the weights of many
+small board patterns. Each tuple is a handful of connected cells; the contents
+of those cells (empty, playable, player 1 or player 2) index its lookup table,
+where playable marks the empty cells a piece would land on next. Every
+tuple is also read through the left-right mirror of the board, sharing the same
+table. A position is worth tanh(sum of lookups), from +1 (player 1 wins) to -1
+(player 2 wins). The weights are trained by TD(0) self-play over batches of
+games (batch_env.BatchConnect4) and stored in a small binary file.
+
+Train it with train.py:
+    python train.py c4 --p1 rl --p2 rl --episodes 200000
+"""
+import os
+import struct
+import numpy as np
+from connect4 import ROWS, COLS, COL_STRIDE, BOTTOM_MASK, BOARD_MASK, COLUMN_MASKS, winning_positions
+from batch_env import BatchConnect4, random_legal
+from mcts import has_four_batch
+
+# --- Network format ---
+# Little-endian, every section aligned to 8 bytes:
+#   header   magic, version, tuple length K, tuple count T, games trained and the offsets of the sections below
+#   tuples   T * K uint8 cells (row * COLS + col, row 0 at the top as in Connect4.board)
+#   weights  T * 4**K float32 lookup tables, table t at t * 4**K
+NETWORK_MAGIC = b'C4N1'
+NETWORK_VERSION = 1
+NETWORK_FILE = 'c4_ntuple.bin'
+_HEADER = struct.Struct('<4sHHHxxQQQ')
+
+CELLS = ROWS * COLS
+PLAYABLE = 3  # Cell code of an empty cell a piece can be dropped on; 0 is any other empty cell
+# Cell above each cell, or CELLS (a row of zeros in `_delta`) for the top row
+_BOARD = np.uint64(BOARD_MASK)
+_ABOVE = np.array([cell - COLS if cell >= COLS else CELLS for cell in range(CELLS)], dtype=np.intp)
+
+def _pad(n):
+    return (n + 7) & ~7
+
+def make_tuples(count, length, seed=0):
+    """
+    Draws distinct tuples of connected cells (each cell touching an earlier one, diagonals included).
+    Returns:
+        numpy.ndarray: (count, length) cell indices.
+    """
+    rng = np.random.default_rng(seed)
+    tuples, seen = [], set()
+    while len(tuples) < count:
+        cells = [int(rng.integers(CELLS))]
+        while len(cells) < length:
+            r, c = divmod(cells[int(rng.integers(len(cells)))], COLS)
+            dr, dc = rng.integers(-1, 2, size=2)
+            if 0 <= r + dr < ROWS and 0 <= c + dc < COLS and (r + dr) * COLS + c + dc not in cells:
+                cells.append(int((r + dr) * COLS + c + dc))
+        key = frozenset(cells)
+        if key not in seen:
+            seen.add(key)
+            tuples.append(sorted(cells))
+    return np.array(tuples, dtype=np.intp)
+
+class NTupleNetwork:
+    """
+    Board values from n-tuple lookup tables.
+    `indices` turns boards into one table index per placement (each tuple and its
+    mirror image). A move changes just two cells, the one played (playable to the
+    player) and the one above it (empty to playable), so the indices of the
+    positions after each move are found from the board's with two rows of `_delta`.
+    """
+    def __init__(self, tuples, weights=None, games=0):
+        """
+        Args:
+            tuples (numpy.ndarray): (T, K) cell indices of each tuple.
+            weights (numpy.ndarray): T * 4**K float32 weights (None for all zero).
+            games (int): Self-play games the weights have been trained on.
+        """
+        self.tuples = np.asarray(tuples, dtype=np.intp)
+        count, self.length = self.tuples.shape
+        size = 4 ** self.length
+        self.weights = np.zeros(count * size, dtype=np.float32) if weights is None else weights
+        self.games = games
+        rows, cols = np.divmod(self.tuples, COLS)
+        self._cells = np.concatenate([self.tuples, rows * COLS + (COLS - 1 - cols)])  # (P, K) placements
+        self._offsets = np.tile(np.arange(count) * size, 2)                           # Table of each placement
+        self._powers = 4 ** np.arange(self.length)
+        # _delta[cell, p]: index change of placement p per unit of change in the code of `cell`
+        self._delta = np.zeros((CELLS + 1, len(self._cells)), dtype=np.intp)
+        for p, cells in enumerate(self._cells):
+            self._delta[cells, p] = self._powers
+        self._start = self.indices(np.zeros(CELLS, dtype=np.int8))  # Indices of the empty board
+
+    @classmethod
+    def create(cls, count=64, length=6, seed=0):
+        """Returns an untrained network of `count` random tuples of `length` cells."""
+        return cls(make_tuples(count, length, seed))
+
+    def indices(self, cells):
+        """
+        Table indices of boards.
+        Args:
+            cells (numpy.ndarray): (..., 42) cells, 0 for empty and 1 or 2 for the players.
+        Returns:
+            numpy.ndarray: (..., P) weight indices, one per placement.
+        """
+        grid = np.asarray(cells, dtype=np.intp).reshape(np.shape(cells)[:-1] + (ROWS, COLS))
+        supported = np.ones(grid.shape, dtype=bool)
+        supported[..., :-1, :] = grid[..., 1:, :] != 0
+        codes = (grid + PLAYABLE * ((grid == 0) & supported)).reshape(np.shape(cells))
+        return (codes[..., self._cells] * self._powers).sum(-1) + self._offsets
+
+    def _after(self, base, targets, player):
+        """Indices after `player` drops a piece on each cell of `targets`, from the board's indices `base`."""
+        return base + (player - PLAYABLE) * self._delta[targets] + PLAYABLE * self._delta[_ABOVE[targets]]
+
+    def value_of(self, indices):
+        """Returns the values (tanh of the summed weights) of boards given by their indices."""
+        return np.tanh(self.weights[indices].sum(-1))
+
+    def evaluate(self, cells):
+        """Returns the values of boards given as (..., 42) cells, +1 meaning a win for player 1."""
+        return self.value_of(self.indices(cells))
+
+    def best_move(self, board, heights, own, mask, player):
+        """
+        Picks the move leading to the best-valued position for the player to move.
+        Immediate tactics come first: a win is taken, an opponent's win is blocked
+        and moves that let the opponent win on top of them are avoided.
+        Args:
+            board (list): Connect4.board.
+            heights (list): Pieces in each column.
+            own (int): Bitboard of the mover's pieces.
+            mask (int): Bitboard of every occupied cell.
+            player (int): The player to move (1 or 2).
+        Returns:
+            int: The chosen column, or None if the board is full.
+        """
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        if not possible:
+            return None
+        wins = winning_positions(own, mask) & possible
+        if wins:
+            return (wins.bit_length() - 1) // COL_STRIDE
+        threats = winning_positions(own ^ mask, mask)
+        if threats & possible:
+            return ((threats & possible).bit_length() - 1) // COL_STRIDE
+        moves = [c for c in range(COLS) if possible & COLUMN_MASKS[c] and not threats & (possible & COLUMN_MASKS[c]) << 1]
+        if not moves:
+            moves = [c for c in range(COLS) if possible & COLUMN_MASKS[c]]  # Every move loses; play on
+        base = self.indices(np.ravel(board))
+        targets = [(ROWS - 1 - heights[c]) * COLS + c for c in moves]
+        values = self.value_of(self._after(base, targets, player))
+        return moves[int(np.argmax(values if player == 1 else -values))]
+
+    def _update(self, indices, targets, alpha):
+        """Moves the values of boards (given by their indices) towards `targets` by one gradient step."""
+        values = self.value_of(indices)
+        step = alpha * (targets - values) * (1 - values * values)
+        np.add.at(self.weights, indices.ravel(), np.repeat(step.astype(np.float32), indices.shape[1]))
+
+    def train_self_play(self, games, batch=256, alpha=0.001, epsilon=0.1, seed=None):
+        """
+        Trains by TD(0) self-play: each side plays the afterstate it values best (a
+        random move with probability `epsilon`), and the afterstate left by the
+        previous move learns the value of the one left by this move, or the result
+        when the game ends.
+        Args:
+            games (int): Games to finish, exactly; slots stop counting once the last games have started.
+            batch (int): Games played side by side.
+            alpha (float): Learning rate.
+            epsilon (float): Exploration rate.
+            seed (int): Seed for the exploration moves.
+        Returns:
+            list: [draws, player 1 wins, player 2 wins].
+        """
+        rng = np.random.default_rng(seed)
+        env = BatchConnect4(batch)
+        legal = env.reset()
+        rows = np.arange(batch)
+        cols = np.arange(COLS)
+        col_bits = (cols * COL_STRIDE).astype(np.uint64)
+        base = np.tile(self._start, (batch, 1))    # Indices of every board, kept up to date move by move
+        prev = base.copy()                         # Indices of the afterstate each game's last move left
+        has_prev = np.zeros(batch, dtype=bool)
+        active = rows < games                      # Slots playing a counted game; a slot retires once none are left to start
+        started = int(active.sum())
+        results = [0, 0, 0]
+        while active.any():
+            player = env.current.astype(np.intp)
+            heights = env.heights.astype(np.intp)
+            targets = np.maximum(ROWS - 1 - heights, 0) * COLS + cols
+            after = self._after(base[:, None, :], targets, player[:, None, None])  # (batch, 7, P)
+            # Full columns have no such cell: leave their indices in range, they are masked out below
+            after = np.where(legal[:, :, None], after, base[:, None, :])
+            values = self.value_of(after)
+            # The same tactics as best_move: win, else block, else keep off cells under an opponent's win
+            own = env.bitboards[rows, player - 1][:, None]
+            opponent = env.bitboards[rows, 2 - player][:, None]
+            drops = np.left_shift(np.uint64(1), col_bits + heights.astype(np.uint64))
+            above = (drops << np.uint64(1)) & _BOARD
+            wins = has_four_batch(own | drops) & legal
+            blocks = has_four_batch(opponent | drops) & legal
+            unsafe = has_four_batch(opponent | above) & (above != 0)
+            sign = np.where(player == 1, 1.0, -1.0)[:, None]
+            values = np.where(wins, sign, values)
+            scores = values * sign + 8.0 * wins + 4.0 * blocks - 2.0 * unsafe
+            actions = np.where(legal, scores, -np.inf).argmax(axis=1)
+            explore = rng.random(batch) < epsilon
+            if explore.any():
+                actions[explore] = random_legal(legal[explore], rng)
+
+            chosen = values[rows, actions]
+            chosen_indices = after[rows, actions]
+            _, done, legal = env.step(actions)
+            chosen = np.where(done & (env.winners == 0), 0.0, chosen)  # A full board is a draw
+            learn = has_prev & ~explore & active  # A random move says nothing about the position it was played from
+            if learn.any():
+                self._update(prev[learn], chosen[learn], alpha)
+            prev = chosen_indices
+            has_prev = ~done
+            base = np.where(done[:, None], self._start, chosen_indices)
+            finished = done & active
+            if finished.any():
+                for winner, count in enumerate(np.bincount(env.winners[finished], minlength=3)):
+                    results[winner] += int(count)
+                retired = np.flatnonzero(finished)[games - started:]  # Slots with no game left to start
+                active[retired] = False
+                started += int(finished.sum()) - len(retired)
+        self.games += sum(results)
+        return results
+
+def write_network(network, filename):
+    """Writes a network via a temporary file and a rename."""
+    count, length = network.tuples.shape
+    tuples_at = _pad(_HEADER.size)
+    weights_at = _pad(tuples_at + count * length)
+    temp = filename + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(_HEADER.pack(NETWORK_MAGIC, NETWORK_VERSION, length, count, network.games, tuples_at, weights_at))
+        f.write(b'\0' * (tuples_at - f.tell()))
+        f.write(network.tuples.astype(np.uint8).tobytes())
+        f.write(b'\0' * (weights_at - f.tell()))
+        f.write(network.weights.astype('<f4').tobytes())
+    os.replace(temp, filename)
+
+def read_network(filename):
+    """Reads a network written by `write_network`."""
+    with open(filename, 'rb') as f:
+        data = f.read()
+    magic, version, length, count, games, tuples_at, weights_at = _HEADER.unpack_from(data)
+    if magic != NETWORK_MAGIC or version != NETWORK_VERSION:
+        raise ValueError(f"{filename} is not a version {NETWORK_VERSION} n-tuple network")
+    tuples = np.frombuffer(data, dtype=np.uint8, count=count * length, offset=tuples_at).reshape(count, length)
+    weights = np.frombuffer(data, dtype='<f4', count=count * 4 ** length, offset=weights_at).astype(np.float32)
+    return NTupleNetwork(tuples, weights, games)
+
+def open_network(filename=NETWORK_FILE):
+    """Reads the network, or returns None if the file does not exist."""
+    if not os.path.exists(filename):
+        return None
+    return read_network(filename)
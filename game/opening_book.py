@@ -0,0 +1,204 @@
+"""
+Connect 4 opening book: best moves for every position of the first few plies,
+searched offline and stored in a sorted binary file that is memory-mapped at
+runtime, so a lookup costs a binary search instead of a search.
+
+Build it from the game directory (see --help for the search budget):
+    python opening_book.py --ply 4 --workers 4
+"""
+import argparse
+import array
+import bisect
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+from connect4 import ROWS, COLS, COL_STRIDE, BOTTOM_MASK, COLUMN_MASKS, has_four, Connect4Search
+
+# --- Book format ---
+# Little-endian, every section aligned to 8 bytes:
+#   header  magic, version, ply, entry count N and the offsets of the sections below
+#   keys    N uint64 canonical position keys (`canonical_key`), sorted ascending
+#   scores  N int32 search scores for the player to move
+#   moves   N uint8 best columns, for the position as its key encodes it
+BOOK_MAGIC = b'C4B1'
+BOOK_VERSION = 1
+BOOK_FILE = 'c4_book.bin'
+_HEADER = struct.Struct('<4sHHQQQQ')
+
+def _pad(n):
+    return (n + 7) & ~7
+
+def mirror(bitboard):
+    """Reflects a bitboard left to right."""
+    column = (1 << COL_STRIDE) - 1
+    result = 0
+    for c in range(COLS):
+        result |= ((bitboard >> (c * COL_STRIDE)) & column) << ((COLS - 1 - c) * COL_STRIDE)
+    return result
+
+def canonical_key(pos, mask):
+    """
+    Folds a position and its mirror image onto one key.
+    `pos + mask` identifies a position uniquely (the sentinel bit above each
+    column's top piece marks its height), so keys never collide.
+    Args:
+        pos (int): Bitboard of the pieces of the player to move.
+        mask (int): Bitboard of every occupied cell.
+    Returns:
+        tuple: (key, mirrored) where `mirrored` is True if the key is that of the mirror image.
+    """
+    key = pos + mask
+    mirrored_key = mirror(pos) + mirror(mask)
+    if mirrored_key < key:
+        return mirrored_key, True
+    return key, False
+
+class OpeningBook:
+    """
+    A memory-mapped opening book. Opening reads only the header; `probe` binary
+    searches the sorted keys, so the book is never loaded into memory as a whole.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, ply, n, keys_at, scores_at, moves_at = _HEADER.unpack_from(self._map)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            self._map.close()
+            raise ValueError(f"{filename} is not a version {BOOK_VERSION} opening book")
+        view = memoryview(self._map)
+        self.ply = ply  # Deepest position in the book, in pieces on the board
+        self._n = n
+        self._keys = view[keys_at:keys_at + 8 * n].cast('Q')
+        self._scores = view[scores_at:scores_at + 4 * n].cast('i')
+        self._moves = view[moves_at:moves_at + n]
+
+    def __len__(self):
+        return self._n
+
+    def probe(self, pos, mask):
+        """
+        Looks up a position.
+        Args:
+            pos (int): Bitboard of the pieces of the player to move.
+            mask (int): Bitboard of every occupied cell.
+        Returns:
+            tuple: (col, score) for the player to move, or None if the position is not in the book.
+        """
+        if self._map is None or mask.bit_count() > self.ply:
+            return None
+        key, mirrored = canonical_key(pos, mask)
+        i = bisect.bisect_left(self._keys, key)
+        if i == self._n or self._keys[i] != key:
+            return None
+        col = self._moves[i]
+        return (COLS - 1 - col if mirrored else col), self._scores[i]
+
+    def close(self):
+        """Releases the file mapping."""
+        if self._map is None:
+            return
+        for view in (self._keys, self._scores, self._moves):
+            view.release()
+        self._map.close()
+        self._map = None
+        self._n = 0
+
+def open_book(filename=BOOK_FILE):
+    """Opens the opening book, or returns None if the file does not exist."""
+    if not os.path.exists(filename):
+        return None
+    return OpeningBook(filename)
+
+def book_positions(ply):
+    """
+    Lists every position with at most `ply` pieces on the board that is not over,
+    one per mirror pair.
+    Returns:
+        dict: Maps canonical keys to (pos, mask) of the position as the key encodes it.
+    """
+    positions = {}
+    def visit(pos, mask, played):
+        key, mirrored = canonical_key(pos, mask)
+        if key in positions:
+            return
+        positions[key] = (mirror(pos), mirror(mask)) if mirrored else (pos, mask)
+        if played == ply or played == ROWS * COLS:
+            return
+        possible = mask + BOTTOM_MASK
+        for c in range(COLS):
+            move_bit = possible & COLUMN_MASKS[c]
+            if move_bit and not has_four(pos | move_bit):
+                visit(pos ^ mask, mask | move_bit, played + 1)
+    visit(0, 0, 0)
+    return positions
+
+def _search_positions(job):
+    """Searches a chunk of positions with one searcher, so they share its transposition table."""
+    positions, time_limit, max_nodes = job
+    search = Connect4Search(time_limit=time_limit, max_nodes=max_nodes, table_size=1 << 20)
+    results = []
+    for key, (pos, mask) in positions:
+        col = search.best_move(pos, mask)
+        results.append((key, search.best_score, col))
+    return results
+
+def build_book(ply, time_limit=None, max_nodes=100000, workers=1):
+    """
+    Searches every book position.
+    Args:
+        ply (int): Deepest position to include, in pieces on the board.
+        time_limit (float): Seconds per position (None for no limit).
+        max_nodes (int): Nodes per position (None for no limit).
+        workers (int): Processes to spread the positions over.
+    Returns:
+        list: (key, score, col) entries, sorted by key.
+    """
+    # Deepest positions first, so shallower ones find their subtrees in the table
+    positions = sorted(book_positions(ply).items(), key=lambda item: -item[1][1].bit_count())
+    chunks = [positions[i::workers] for i in range(workers) if positions[i::workers]]
+    jobs = [(chunk, time_limit, max_nodes) for chunk in chunks]
+    if len(jobs) == 1:
+        outputs = [_search_positions(jobs[0])]
+    else:
+        with multiprocessing.Pool(len(jobs)) as pool:
+            outputs = pool.map(_search_positions, jobs)
+    return sorted(entry for output in outputs for entry in output)
+
+def write_book(entries, filename, ply):
+    """Writes sorted (key, score, col) entries via a temporary file and a rename."""
+    n = len(entries)
+    keys = array.array('Q', (key for key, _, _ in entries))
+    scores = array.array('i', (score for _, score, _ in entries))
+    moves = bytes(col for _, _, col in entries)
+    keys_at = _pad(_HEADER.size)
+    scores_at = keys_at + 8 * n
+    moves_at = scores_at + 4 * n
+    temp = filename + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, ply, n, keys_at, scores_at, moves_at))
+        f.write(b'\0' * (keys_at - f.tell()))
+        keys.tofile(f)
+        scores.tofile(f)
+        f.write(moves)
+    os.replace(temp, filename)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Connect 4 opening book.")
+    parser.add_argument('--ply', type=int, default=4, help="deepest position to include, in pieces on the board")
+    parser.add_argument('--nodes', type=int, default=100000, help="search nodes per position (0 for no limit)")
+    parser.add_argument('--time', type=float, default=None, help="search seconds per position")
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help="processes to spread positions over")
+    parser.add_argument('--out', default=BOOK_FILE, help="book file to write")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    entries = build_book(args.ply, args.time, args.nodes or None, max(1, args.workers))
+    write_book(entries, args.out, args.ply)
+    print(f"{len(entries):,} positions up to ply {args.ply} in {time.perf_counter() - start:.1f} s; "
+          f"wrote {args.out} ({os.path.getsize(args.out):,} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,245 @@
+import array
+import bisect
+import hashlib
 import json
+import mmap
 import os
-from ui import Button
-from ttt import TicTacToe
-from rps import RPS
-from connect4 import Connect4
-from config import WIDTH, HEIGHT, BG_COLOR, WHITE, init_fonts, GRID_COLOR, BORDER_COLOR, X_COLOR, O_COLOR, HIGHLIGHT, MESSAGE_BG, C4_P1_COLOR, C4_P2_COLOR
-from utils import valid_moves
+import platform
+import struct
+import threading
+from collections.abc import MutableMapping
+
+# The browser build has no threads: there tables are only saved at quit
+THREADED = platform.system() != "Emscripten"
+
+# --- Binary Q-table format ---
+# Little-endian, every section aligned to 8 bytes:
+#   header   magic, version, action count A, state count N and the offsets of the sections below
+#   actions  A action names, each a uint16 byte length followed by UTF-8 bytes
+#   keys     N uint64 state ids (`state_id`), sorted ascending
+#   values   N * A float64 Q-values, row i for keys[i]; NaN marks an action the state lacks
+#   offsets  N + 1 uint64 offsets into the name blob, row i for keys[i]
+#   names    UTF-8 state names, kept so tables can be iterated and exported to JSON
+BINARY_MAGIC = b'QTB1'
+BINARY_VERSION = 1
+BINARY_EXTENSION = '.qtb'
+_HEADER = struct.Struct('<4sHHQQQQQ')
+
+def state_id(state):
+    """
+    Encodes a state key as the 64-bit integer used by the binary index.
+    Args:
+        state (str): The Q-table state key.
+    Returns:
+        int: The first 8 bytes of the key's BLAKE2b digest.
+    """
+    return int.from_bytes(hashlib.blake2b(state.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def _pad(n):
+    return (n + 7) & ~7
+
+class MappedQTable(MutableMapping):
+    """
+    A Q-table backed by a memory-mapped binary file.
+    Opening reads only the header; rows are found by binary search over the sorted
+    state ids and decoded when first accessed. Rows that are read or written move
+    into an in-memory overlay, so the usual dict updates (`setdefault`, in-place
+    `+=` on a row) work as they do on a dict loaded from JSON.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_actions, n_states, keys_at, values_at, offsets_at, names_at = _HEADER.unpack_from(self._map)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            self._map.close()
+            raise ValueError(f"{filename} is not a version {BINARY_VERSION} binary Q-table")
+        view = memoryview(self._map)
+        self.actions = []
+        pos = _HEADER.size
+        for _ in range(n_actions):
+            (size,) = struct.unpack_from('<H', self._map, pos)
+            self.actions.append(bytes(view[pos + 2:pos + 2 + size]).decode('utf-8'))
+            pos += 2 + size
+        self._n = n_states
+        self._keys = view[keys_at:keys_at + 8 * n_states].cast('Q')
+        self._values = view[values_at:values_at + 8 * n_states * n_actions].cast('d')
+        self._offsets = view[offsets_at:offsets_at + 8 * (n_states + 1)].cast('Q')
+        self._names = view[names_at:]
+        self._overlay = {}      # Rows read or written since loading
+        self._deleted = set()   # File rows removed since loading
+        self._len = n_states
+
+    def _name(self, i):
+        return bytes(self._names[self._offsets[i]:self._offsets[i + 1]]).decode('utf-8')
+
+    def _find(self, state):
+        """Returns the file row of `state`, or -1 if the file does not hold it."""
+        if self._map is None:
+            return -1
+        key = state_id(state)
+        i = bisect.bisect_left(self._keys, key)
+        while i < self._n and self._keys[i] == key:
+            if self._name(i) == state:
+                return i
+            i += 1
+        return -1
+
+    def _row(self, i):
+        n_actions = len(self.actions)
+        row = self._values[i * n_actions:(i + 1) * n_actions]
+        return {a: v for a, v in zip(self.actions, row) if v == v} # NaN != NaN marks a missing action
+
+    def __getitem__(self, state):
+        if state in self._overlay:
+            return self._overlay[state]
+        if state in self._deleted:
+            raise KeyError(state)
+        i = self._find(state)
+        if i < 0:
+            raise KeyError(state)
+        row = self._overlay[state] = self._row(i)
+        return row
+
+    def __setitem__(self, state, value):
+        if state not in self._overlay:
+            if state in self._deleted:
+                self._deleted.discard(state)
+                self._len += 1
+            elif self._find(state) < 0:
+                self._len += 1
+        self._overlay[state] = value
+
+    def __delitem__(self, state):
+        in_file = state not in self._deleted and self._find(state) >= 0
+        if state not in self._overlay and not in_file:
+            raise KeyError(state)
+        self._overlay.pop(state, None)
+        if in_file:
+            self._deleted.add(state)
+        self._len -= 1
+
+    def __contains__(self, state):
+        if state in self._overlay:
+            return True
+        return state not in self._deleted and self._find(state) >= 0
+
+    def __iter__(self):
+        yield from list(self._overlay)
+        if self._map is not None:
+            for i in range(self._n):
+                state = self._name(i)
+                if state not in self._overlay and state not in self._deleted:
+                    yield state
+
+    def __len__(self):
+        return self._len
+
+    def detach(self):
+        """Copies every remaining row into memory and closes the file mapping."""
+        if self._map is None:
+            return
+        for i in range(self._n):
+            state = self._name(i)
+            if state not in self._overlay and state not in self._deleted:
+                self._overlay[state] = self._row(i)
+        self.close()
+
+    def close(self):
+        """Releases the file mapping; rows not yet read are dropped."""
+        if self._map is None:
+            return
+        for view in (self._keys, self._values, self._offsets, self._names):
+            view.release()
+        self._map.close()
+        self._map = None
+        self._n = 0
+        self._len = len(self._overlay)
+
+def _write_binary(q_table, filename):
+    """Writes a Q-table in the binary format via a temporary file and a rename."""
+    actions = []
+    seen = set()
+    for row in q_table.values():
+        for action in row:
+            if action not in seen:
+                seen.add(action)
+                actions.append(action)
+    column = {a: j for j, a in enumerate(actions)}
+
+    entries = sorted((state_id(str(state)), str(state), row) for state, row in q_table.items())
+    keys = array.array('Q', (key for key, _, _ in entries))
+    values = array.array('d', [float('nan')]) * (len(entries) * len(actions))
+    offsets = array.array('Q', [0])
+    names = bytearray()
+    for i, (_, state, row) in enumerate(entries):
+        base = i * len(actions)
+        for action, value in row.items():
+            values[base + column[action]] = value
+        names += state.encode('utf-8')
+        offsets.append(len(names))
+
+    action_block = b''.join(struct.pack('<H', len(a.encode('utf-8'))) + a.encode('utf-8') for a in actions)
+    keys_at = _pad(_HEADER.size + len(action_block))
+    values_at = keys_at + 8 * len(keys)
+    offsets_at = values_at + 8 * len(values)
+    names_at = offsets_at + 8 * len(offsets)
+    header = _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(actions), len(entries), keys_at, values_at, offsets_at, names_at)
+
+    temp = filename + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(header)
+        f.write(action_block)
+        f.write(b'\0' * (keys_at - f.tell()))
+        keys.tofile(f)
+        values.tofile(f)
+        offsets.tofile(f)
+        f.write(names)
+    if isinstance(q_table, MappedQTable) and q_table._map is not None and os.path.abspath(q_table.filename) == os.path.abspath(filename):
+        q_table.detach() # The old file must not stay mapped while it is replaced
+    os.replace(temp, filename)
+
+def is_binary_q_table(filename):
+    """Checks whether a file starts with the binary Q-table magic bytes."""
+    with open(filename, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+def _write_json(q_table, filename):
+    """Writes a Q-table as JSON via a temporary file and a rename, so a crash mid-write leaves the previous file intact."""
+    temp = filename + '.tmp'
+    with open(temp, 'w') as f:
+        json.dump(q_table, f)
+    os.replace(temp, filename)
 
 def reset_q_table(filename):
     """
     Resets the Q-table by saving an empty dictionary to the specified file.
     Args:
-        filename (str): The name of the JSON file to reset.
+        filename (str): The name of the JSON or binary file to reset.
     Returns:
         str: A message indicating the result of the reset operation.
     """
     try:
-        with open(filename, 'w') as f:
-            json.dump({}, f)
+        if filename.endswith(BINARY_EXTENSION):
+            _write_binary({}, filename)
+        else:
+            _write_json({}, filename)
         return f"Q-table {filename} has been reset."
     except Exception as e:
         return f"Error resetting Q-table {filename}: {str(e)}"
 
 def load_q_table(filename):
     """
-    Loads the Q-table from a JSON file.
+    Loads the Q-table from a JSON or binary file; the format is detected from the file contents.
     Args:
-        filename (str): The name of the JSON file to load.
+        filename (str): The name of the file to load.
     Returns:
-        dict: The loaded Q-table, or an empty dictionary if the file doesn't exist.
+        dict or MappedQTable: The loaded Q-table, or an empty dictionary if the file doesn't exist.
     """
     try:
         if os.path.exists(filename):
+            if is_binary_q_table(filename):
+                return MappedQTable(filename)
             with open(filename, 'r') as f:
                 return json.load(f)
         return {}
@@ -41,13 +249,138 @@ def load_q_table(filename):
 
 def save_q_table(q_table, filename):
     """
-    Saves the Q-table to a JSON file.
+    Saves the Q-table to a file: binary for names ending in BINARY_EXTENSION, JSON otherwise.
     Args:
-        q_table (dict): The Q-table to save.
-        filename (str): The name of the JSON file to save to.
+        q_table (dict or MappedQTable): The Q-table to save.
+        filename (str): The name of the file to save to.
     """
     try:
-        with open(filename, 'w') as f:
-            json.dump(q_table, f)
+        if filename.endswith(BINARY_EXTENSION):
+            _write_binary(q_table, filename)
+            return
+        if not isinstance(q_table, dict):
+            q_table = dict(q_table.items())
+        _write_json(q_table, filename)
     except Exception as e:
-        print(f"Error saving Q-table {filename}: {str(e)}")
\ No newline at end of file
+        print(f"Error saving Q-table {filename}: {str(e)}")
+
+def convert_q_table(source, destination):
+    """
+    Converts a Q-table between formats, e.g. a JSON table to binary or back.
+    Args:
+        source (str): The file to read (either format).
+        destination (str): The file to write; its extension picks the format.
+    """
+    save_q_table(load_q_table(source), destination)
+
+class TrackedQTable(dict):
+    """
+    A Q-table in the dict layout that remembers which states changed since
+    they were last checkpointed. Adding a row marks it; engines that update a
+    row in place add its state to `dirty` themselves.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dirty = set()
+
+    def __setitem__(self, state, row):
+        super().__setitem__(state, row)
+        self.dirty.add(state)
+
+    def rows(self, states):
+        """Returns copies of the rows of `states`."""
+        return {state: dict(self[state]) for state in states if state in self}
+
+class QTableStore:
+    """
+    Loads each game's Q-table on first use and checkpoints the ones that change.
+    The RPS table is wrapped in a QTable; the others are TrackedQTables. Both
+    keep a `dirty` set of the states changed since the last checkpoint. Every
+    `interval` seconds a background thread copies just those rows into its own
+    copy of each table and writes the tables that changed (JSON rewrites the
+    whole file, via a temporary file and a rename). The game thread only adds
+    states to the dirty sets, so it never waits on the disk; `save` writes the
+    last changes at quit.
+    """
+    FILES = {'ttt': 'q_table_ttt.json', 'rps': 'q_table_rps.json', 'c4': 'q_table_c4.json'}
+
+    def __init__(self, interval=None):
+        """
+        Args:
+            interval (float): Seconds between checkpoints (None to save only at quit);
+                the game passes config.CHECKPOINT_SECONDS.
+        """
+        self.tables = {}
+        self.interval = interval
+        self.copies = {}     # The rows as last written, by game
+        self._lock = threading.Lock()  # Keeps checkpoints from overlapping
+        self._stop = threading.Event()
+        self._thread = None  # Checkpoint thread, started when the first table is loaded
+
+    def get(self, game_type):
+        """Returns the Q-table of 'ttt', 'rps' or 'c4', loading it the first time."""
+        if game_type not in self.tables:
+            table = load_q_table(self.FILES[game_type])
+            if game_type == 'rps':
+                from qtable import QTable
+                table = QTable.from_dict(table)
+                copy = table.to_dict()
+            else:
+                table = TrackedQTable(table.items())
+                table.dirty.clear()
+                copy = table.rows(table)
+            self.copies[game_type] = copy  # Before the table, which the checkpoint thread looks its copy up from
+            self.tables[game_type] = table
+            if THREADED and self.interval and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='q-table-checkpoint', daemon=True)
+                self._thread.start()
+        return self.tables[game_type]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.checkpoint()
+
+    def checkpoint(self):
+        """
+        Writes the tables with changed states.
+        The changed states are cleared from `dirty` before their rows are copied,
+        so a change made meanwhile is either in this copy or left for the next.
+        Returns:
+            list: The games whose tables were written.
+        """
+        written = []
+        with self._lock:
+            for game_type, table in list(self.tables.items()):
+                states = list(table.dirty)
+                if not states:
+                    continue
+                table.dirty.difference_update(states)
+                self.copies[game_type].update(table.rows(states))
+                save_q_table(self.copies[game_type], self.FILES[game_type])
+                written.append(game_type)
+        return written
+
+    def reset(self, game_type):
+        """
+        Empties a game's Q-table in memory and on disk (Settings > Reset AI).
+        The live table is cleared in place, so the engines holding it start over
+        too, and the checkpoint copy with it, so no later checkpoint brings the
+        old rows back.
+        Returns:
+            str: A message indicating the result of the reset operation.
+        """
+        with self._lock:
+            table = self.tables.get(game_type)
+            if table is not None:
+                table.clear()
+                table.dirty.clear()
+                self.copies[game_type] = {}
+            return reset_q_table(self.FILES[game_type])
+
+    def save(self):
+        """Stops the checkpoint thread and writes the last changes; unchanged files are left as they are."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.checkpoint()
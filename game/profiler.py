@@ -0,0 +1,155 @@
+"""
+Timing instrumentation for the game loop and the AI.
+The loop records how long each frame spends handling events, updating,
+drawing and flipping, and AIMove records every ai_move call by game and mode.
+Each timing goes into a rolling histogram of fixed size, which gives p50, p95
+and p99 of the most recent samples. Nothing is recorded while the profiler is
+disabled (config.PROFILE, toggled in game with F3), so it costs one flag check
+per frame. Only the standard library is used.
+"""
+import csv
+import json
+import math
+import time
+
+PROFILE_FILE = 'profile_stats.json'
+PERCENTILES = (50, 95, 99)
+
+class RollingHistogram:
+    """
+    Durations of the last `window` samples, counted in log-spaced buckets.
+    Memory is fixed: a count per bucket plus a ring holding each recent
+    sample's bucket, so the oldest sample leaves the counts as a new one comes
+    in. Percentiles are read as the geometric middle of a bucket, within about
+    6% of the true value.
+    """
+    MIN_SECONDS = 1e-6        # Bucket 0 holds everything faster
+    BUCKETS_PER_DECADE = 20
+    DECADES = 8               # 1 us to 100 s; the last bucket holds everything slower
+
+    def __init__(self, window=1024):
+        """
+        Args:
+            window (int): Number of recent samples the percentiles cover.
+        """
+        self.window = window
+        self.counts = [0] * (self.DECADES * self.BUCKETS_PER_DECADE + 2)
+        self.ring = bytearray(window)  # Bucket of each sample in the window, oldest at `next` once full
+        self.next = 0
+        self.size = 0                  # Samples in the window
+        self.total = 0                 # Samples ever added
+        self.last = 0.0
+
+    def _bucket(self, seconds):
+        if seconds <= self.MIN_SECONDS:
+            return 0
+        bucket = int(math.log10(seconds / self.MIN_SECONDS) * self.BUCKETS_PER_DECADE) + 1
+        return min(bucket, len(self.counts) - 1)
+
+    def _value(self, bucket):
+        """The geometric middle of a bucket, in seconds."""
+        if bucket == 0:
+            return self.MIN_SECONDS
+        return self.MIN_SECONDS * 10 ** ((bucket - 0.5) / self.BUCKETS_PER_DECADE)
+
+    def add(self, seconds):
+        """Records one duration."""
+        bucket = self._bucket(seconds)
+        if self.size == self.window:
+            self.counts[self.ring[self.next]] -= 1
+        else:
+            self.size += 1
+        self.ring[self.next] = bucket
+        self.counts[bucket] += 1
+        self.next = (self.next + 1) % self.window
+        self.total += 1
+        self.last = seconds
+
+    def percentile(self, percent):
+        """
+        Returns the duration below which `percent` percent of the window's samples fall.
+        Args:
+            percent (float): From 0 to 100.
+        Returns:
+            float: Seconds, or 0.0 if there are no samples.
+        """
+        if not self.size:
+            return 0.0
+        rank = max(1, math.ceil(self.size * percent / 100))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self._value(bucket)
+        return self._value(len(self.counts) - 1)
+
+class Profiler:
+    """
+    Named rolling histograms, such as 'frame.draw' or 'ai_move[Connect4,mcts]'.
+    Callers check `enabled` before timing anything, so a disabled profiler
+    costs no clock reads.
+    """
+    def __init__(self, enabled=False, window=1024):
+        """
+        Args:
+            enabled (bool): Whether timings are being recorded.
+            window (int): Samples each histogram keeps.
+        """
+        self.enabled = enabled
+        self.window = window
+        self.stats = {}  # Histograms by name, in the order they were first recorded
+
+    def add(self, name, seconds):
+        """Records a duration under `name`."""
+        histogram = self.stats.get(name)
+        if histogram is None:
+            histogram = self.stats[name] = RollingHistogram(self.window)
+        histogram.add(seconds)
+
+    def timed(self, name, func):
+        """Returns `func` wrapped to record the duration of every call under `name`."""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - start)
+        return wrapper
+
+    def reset(self):
+        """Drops every histogram."""
+        self.stats = {}
+
+    def summary(self):
+        """
+        Returns the current figures of every histogram.
+        Returns:
+            dict: {name: {'count', 'window', 'last', 'p50', 'p95', 'p99'}}, times in seconds.
+        """
+        summary = {}
+        for name, histogram in list(self.stats.items()):  # The AI thread may add a name meanwhile
+            row = {'count': histogram.total, 'window': histogram.size, 'last': histogram.last}
+            for percent in PERCENTILES:
+                row[f'p{percent}'] = histogram.percentile(percent)
+            summary[name] = row
+        return summary
+
+    def export(self, filename=PROFILE_FILE):
+        """
+        Writes the summary to a file: CSV if the name ends in .csv, else JSON.
+        Args:
+            filename (str): The file to write.
+        """
+        summary = self.summary()
+        with open(filename, 'w', newline='') as f:
+            if filename.endswith('.csv'):
+                columns = ['count', 'window', 'last'] + [f'p{percent}' for percent in PERCENTILES]
+                writer = csv.writer(f)
+                writer.writerow(['name'] + columns)
+                for name, row in summary.items():
+                    writer.writerow([name] + [row[column] for column in columns])
+            else:
+                json.dump({'unit': 'seconds', 'stats': summary}, f, indent=2)
+
+# The process-wide profiler, shared by the game loop and the AI worker
+PROFILER = Profiler()
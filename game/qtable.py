@@ -0,0 +1,112 @@
+from collections import Counter
+from utils import RPS_CHOICES
+
+# Names of the symbols that make up an RPS state key, indexed by their code
+STATE_SYMBOLS = ['start'] + RPS_CHOICES
+
+class QTable:
+    """
+    Array-backed Q-table for the Rock Paper Scissors learner.
+    A state is the player's last `history` choices, each coded 0 (start, i.e. no
+    choice yet) or 1-3 (an index into RPS_CHOICES plus one). The codes are the
+    base-4 digits of the state index with the most recent choice lowest, so the
+    next state is (state * 4 + code) % num_states. `values[state, action]` is the
+    Q-value of playing RPS_CHOICES[action] in that state.
+    """
+    def __init__(self, history=2):
+        import numpy as np  # Deferred so importing the engines stays fast
+        self.history = history
+        self.num_states = len(STATE_SYMBOLS) ** history
+        self.values = np.zeros((self.num_states, len(RPS_CHOICES)))
+        self.extra = {}  # Entries of a loaded dict that do not fit this layout, kept for saving
+        self.dirty = set()  # States changed since the last checkpoint (see persistence.QTableStore)
+
+    def next_state(self, state, choice):
+        """
+        Returns the state after the player makes a choice.
+        Args:
+            state (int): The current state index.
+            choice (int): The player's choice as an index into RPS_CHOICES.
+        Returns:
+            int: The next state index.
+        """
+        return (state * len(STATE_SYMBOLS) + choice + 1) % self.num_states
+
+    def state_key(self, state):
+        """Returns the dict/JSON key of a state index, e.g. 'start,rock' (oldest choice first)."""
+        codes = []
+        for _ in range(self.history):
+            state, code = divmod(state, len(STATE_SYMBOLS))
+            codes.append(STATE_SYMBOLS[code])
+        return ','.join(reversed(codes))
+
+    def state_index(self, key):
+        """Returns the state index of a dict/JSON key, or None if it does not fit this table."""
+        symbols = key.split(',')
+        if len(symbols) != self.history or any(s not in STATE_SYMBOLS for s in symbols):
+            return None
+        state = 0
+        for symbol in symbols:
+            state = state * len(STATE_SYMBOLS) + STATE_SYMBOLS.index(symbol)
+        return state
+
+    @staticmethod
+    def key_history(table):
+        """
+        Returns the history length the state keys of a dict-layout table are written with.
+        Keys of other lengths (e.g. the single-choice rows of older tables) end up in
+        `extra`, so the length most keys have wins, the longer one on a tie.
+        Returns:
+            int: The number of choices in its state keys, or None if it has none.
+        """
+        counts = Counter(len(symbols) for symbols in (key.split(',') for key in table)
+                         if all(s in STATE_SYMBOLS for s in symbols))
+        return max(counts, key=lambda length: (counts[length], length)) if counts else None
+
+    @classmethod
+    def from_dict(cls, table, history=None):
+        """
+        Builds a QTable from the dict layout used in q_table_rps.json.
+        Args:
+            table (dict): Maps keys like 'rock,paper' to {choice: Q-value} dicts.
+            history (int): Number of past player choices in a state; None takes it
+                from the keys (2 for an empty table).
+        Returns:
+            QTable: The table; keys of another layout are kept in `extra`.
+        Raises:
+            ValueError: If the keys were written with a different history length.
+        """
+        stored = cls.key_history(table)
+        if history is None:
+            history = stored or 2
+        elif stored is not None and stored != history:
+            raise ValueError(f"Q-table states hold {stored} choices, not the {history} asked for")
+        q = cls(history)
+        for key, row in table.items():
+            state = q.state_index(key)
+            if state is None or any(c not in RPS_CHOICES for c in row):
+                q.extra[key] = row
+                continue
+            for choice, value in row.items():
+                q.values[state, RPS_CHOICES.index(choice)] = value
+        return q
+
+    def clear(self):
+        """Zeroes every Q-value and drops the `extra` entries."""
+        self.values[:] = 0
+        self.extra.clear()
+
+    def rows(self, states):
+        """Returns the rows of state indices `states` in the dict layout."""
+        return {self.state_key(state): dict(zip(RPS_CHOICES, self.values[state].tolist())) for state in states}
+
+    def to_dict(self):
+        """
+        Converts the table to the dict layout used in q_table_rps.json.
+        Returns:
+            dict: Every state that has a non-zero Q-value, plus the `extra` entries.
+        """
+        table = dict(self.extra)
+        for state in self.values.any(axis=1).nonzero()[0]:
+            table[self.state_key(int(state))] = dict(zip(RPS_CHOICES, self.values[state].tolist()))
+        return table
@@ -1,110 +1,188 @@
 import random
-from utils import RPS_CHOICES, RPS_OUTCOMES, ALPHA, GAMMA, EPSILON
+from collections import deque
+from utils import RPS_CHOICES, RPS_OUTCOMES, RPS_COUNTER, ALPHA, GAMMA, EPSILON
+from qtable import QTable
+
+HISTORY_LIMIT = 1000  # Most recent rounds kept in `history`; older rounds live on only in the counts
+
+class MetaPredictor:
+    """
+    A panel of predictors of the player's next choice, played through the one
+    that has been scoring best recently.
+    Choices are indices into RPS_CHOICES, so (c + 1) % 3 beats c. The base
+    predictors are a frequency count and n-gram models of orders 1 to ORDERS[-1]
+    over the player's choices. Each base prediction p yields three strategies:
+    play (p + 1 + r) % 3 for r = 0 (beat the prediction), 1 (beat the player
+    beating that) and 2 (beat the player beating that in turn). All state lives
+    in fixed-size lists, so a round costs O(strategies).
+    """
+    ORDERS = (1, 2, 3, 4, 5)
+    DECAY = 0.9  # Weight kept by a strategy's past score each round
+
+    def __init__(self):
+        self.frequency = [0, 0, 0]
+        # counts[k][context * 3 + c]: times the player chose c after the last k choices `context` (base 3)
+        self.counts = [[0] * (3 ** (k + 1)) for k in self.ORDERS]
+        self.contexts = [0] * len(self.ORDERS)
+        self.seen = 0  # Player choices observed so far
+        n = 3 * (1 + len(self.ORDERS))
+        self.scores = [0.0] * n
+        self.moves = [0] * n  # Move each strategy proposes for the coming round
+
+    def choose(self):
+        """Returns the move (index) of the best-scoring strategy, random before any history."""
+        if not self.seen:
+            return random.randrange(3)
+        best = max(range(len(self.scores)), key=self.scores.__getitem__)
+        return self.moves[best]
+
+    def update(self, choice):
+        """
+        Scores every strategy against the player's choice, then learns it.
+        Args:
+            choice (int): The player's choice as an index into RPS_CHOICES.
+        """
+        if self.seen:
+            for i, move in enumerate(self.moves):
+                # +1 when the strategy's move would have won, -1 when it would have lost
+                result = (move - choice) % 3
+                self.scores[i] = self.scores[i] * self.DECAY + (1 if result == 1 else -1 if result == 2 else 0)
+
+        self.frequency[choice] += 1
+        for k, order in enumerate(self.ORDERS):
+            if self.seen >= order:
+                self.counts[k][self.contexts[k] * 3 + choice] += 1
+            self.contexts[k] = (self.contexts[k] * 3 + choice) % (3 ** order)
+        self.seen += 1
+
+        fallback = self._argmax(self.frequency, 0)
+        predictions = [fallback]
+        for k in range(len(self.ORDERS)):
+            base = self.contexts[k] * 3
+            row = self.counts[k]
+            predictions.append(self._argmax(row, base) if row[base] or row[base + 1] or row[base + 2] else fallback)
+        for i, predicted in enumerate(predictions):
+            for r in range(3):
+                self.moves[i * 3 + r] = (predicted + 1 + r) % 3
+
+    @staticmethod
+    def _argmax(values, start):
+        """Returns the offset (0-2) of the largest of values[start:start + 3]."""
+        a, b, c = values[start], values[start + 1], values[start + 2]
+        if a >= b and a >= c:
+            return 0
+        return 1 if b >= c else 2
+
 
 class RPS:
     """
     Implements the Rock Paper Scissors game logic.
-    Supports player moves and AI moves (naive, biased, Q-learning).
+    Supports player moves and AI moves (naive, biased, Q-learning, meta-predictor).
     """
-    def __init__(self, qtable):
-        self.history = []     # Stores history of (player_choice, ai_choice)
-        self.state = 'start,start'  # Current state for Q-learning (last two player choices as string)
-        self.score = [0, 0]   # [Player Score, AI Score]
-        self.q = qtable       # Q-table for RL agent
+    def __init__(self, qtable, history=None):
+        """
+        Args:
+            qtable (QTable | dict): Q-table for the RL agent; a dict in the q_table_rps.json layout is converted.
+            history (int): Player choices per Q-learning state (None: the table's own).
+        Raises:
+            ValueError: If the table was built for another history length.
+        """
+        if isinstance(qtable, QTable):
+            if history is not None and history != qtable.history:
+                raise ValueError(f"Q-table states hold {qtable.history} choices, not the {history} asked for")
+            self.q = qtable
+        else:
+            self.q = QTable.from_dict(qtable, history)
+        self.reset()
 
     def reset(self):
         """Resets the game history and score for a new game."""
-        self.history = []
-        self.state = 'start,start'
-        self.score = [0, 0]
+        self.history = deque(maxlen=HISTORY_LIMIT)  # Recent (player_choice, ai_choice) rounds
+        # transitions[prev][next]: how often the player followed `prev` with `next`
+        self.transitions = {c: {next_c: 0 for next_c in RPS_CHOICES} for c in RPS_CHOICES}
+        self.meta = MetaPredictor()  # Learns from every round, whichever mode played it
+        self.state = 0        # Current Q-learning state index (no player choices yet)
+        self.score = [0, 0]   # [Player Score, AI Score]
 
     def play(self, player_choice, mode):
         """
         Processes a round of Rock Paper Scissors.
         Args:
             player_choice (str): The player's choice ('rock', 'paper', 'scissors').
-            mode (str): The AI difficulty mode ('naive', 'biased', 'rl').
+            mode (str): The AI difficulty mode ('naive', 'biased' or 'biassed', 'rl', 'meta').
         Returns:
             tuple: (ai_choice, outcome) where outcome is 1 (AI wins), 0 (tie), -1 (player wins).
         """
         if player_choice not in RPS_CHOICES:
             return None, None  # Invalid player choice
 
-        ai_choice = None
+        ai_choice = self.choose(mode)
+        return ai_choice, self.record(player_choice, ai_choice, mode)
+
+    def choose(self, mode):
+        """
+        Picks the AI's choice for the coming round without seeing the player's.
+        Args:
+            mode (str): The AI difficulty mode ('naive', 'biased' or 'biassed', 'rl', 'meta').
+        Returns:
+            str: The AI's choice.
+        """
         if mode == 'naive':
-            ai_choice = random.choice(RPS_CHOICES)  # Random AI
-        elif mode == 'biased':
+            return random.choice(RPS_CHOICES)  # Random AI
+        elif mode in ('biased', 'biassed'):
             # Naive Bayes prediction based on player's previous choice
-            if len(self.history) < 1:  # No history, use original biased weights
-                ai_choice = random.choices(RPS_CHOICES, [0.5, 0.25, 0.25])[0]
-            else:
-                # Initialize transition counts
-                transitions = {c: {next_c: 0 for next_c in RPS_CHOICES} for c in RPS_CHOICES}
-                for i in range(len(self.history) - 1):
-                    prev_choice = self.history[i][0]
-                    next_choice = self.history[i + 1][0]
-                    transitions[prev_choice][next_choice] += 1
-
-                # Get the last player choice
-                last_choice = self.history[-1][0]
-
-                # Calculate probabilities with Laplace smoothing
-                probs = {}
-                total_transitions = sum(transitions[last_choice].values()) + len(RPS_CHOICES)
-                for next_choice in RPS_CHOICES:
-                    count = transitions[last_choice][next_choice] + 1  # Laplace smoothing
-                    probs[next_choice] = count / total_transitions
-
-                # Predict the player's most likely next choice
-                predicted_choice = max(probs, key=probs.get)
-
-                # Choose AI move to beat the predicted choice
-                if predicted_choice == 'rock':
-                    ai_choice = 'paper'
-                elif predicted_choice == 'paper':
-                    ai_choice = 'scissors'
-                else:  # predicted_choice == 'scissors'
-                    ai_choice = 'rock'
-        else:  # 'rl' mode (Q-learning agent)
-            # Ensure the current state exists in the Q-table, initialize if not
-            table = self.q.setdefault(self.state, {c: 0 for c in RPS_CHOICES})
-
-            # Epsilon-greedy strategy for AI's choice
-            if random.random() < EPSILON:
-                ai_choice = random.choice(RPS_CHOICES)  # Explore
-            else:
-                # Exploit: choose the action with the highest Q-value
-                max_q = -float('inf')
-                best_ai_choices = []
-                for choice_ai, q_value in table.items():
-                    if q_value > max_q:
-                        max_q = q_value
-                        best_ai_choices = [choice_ai]
-                    elif q_value == max_q:
-                        best_ai_choices.append(choice_ai)
-                ai_choice = random.choice(best_ai_choices) if best_ai_choices else random.choice(RPS_CHOICES)
-
-            # Determine the outcome from the AI's perspective
-            player_outcome_value = RPS_OUTCOMES[(player_choice, ai_choice)]
-            ai_reward = -player_outcome_value
-
-            # Compute the next state (last two player choices as string)
-            if self.state == 'start,start':
-                next_state = f"start,{player_choice}"
-            else:
-                next_state = f"{self.state.split(',')[1]},{player_choice}"
-
-            # Ensure Q-values for the next state are initialized
-            next_state_q_values = self.q.setdefault(next_state, {c: 0 for c in RPS_CHOICES})
+            if not self.history:  # No history, use original biased weights
+                return random.choices(RPS_CHOICES, [0.5, 0.25, 0.25])[0]
+            # Laplace smoothing adds 1 to every count, which leaves the most
+            # likely next choice unchanged: pick the largest count directly
+            counts = self.transitions[self.history[-1][0]]
+            predicted_choice = max(RPS_CHOICES, key=counts.get)
+
+            # Choose AI move to beat the predicted choice
+            return RPS_COUNTER[predicted_choice]
+        elif mode == 'meta':
+            return RPS_CHOICES[self.meta.choose()]
+
+        # 'rl' mode (Q-learning agent): epsilon-greedy strategy for AI's choice
+        if random.random() < EPSILON:
+            return random.choice(RPS_CHOICES)  # Explore
+        # Exploit: choose the action with the highest Q-value
+        row = self.q.values[self.state].tolist()
+        max_q = max(row)
+        return RPS_CHOICES[random.choice([a for a, q_value in enumerate(row) if q_value == max_q])]
+
+    def record(self, player_choice, ai_choice, mode):
+        """
+        Completes a round: learns from both choices and updates the score.
+        Args:
+            player_choice (str): The player's choice.
+            ai_choice (str): The AI's choice, as returned by `choose`.
+            mode (str): The mode that made the AI's choice.
+        Returns:
+            int: The outcome from the player's perspective (1 win, 0 tie, -1 loss).
+        """
+        outcome = RPS_OUTCOMES[(player_choice, ai_choice)]  # Outcome from player's perspective
+
+        if mode not in ('naive', 'biased', 'biassed', 'meta'):  # 'rl' mode (Q-learning agent)
+            values = self.q.values
+            action = RPS_CHOICES.index(ai_choice)
+            ai_reward = -outcome  # The outcome from the AI's perspective
+
+            # Next state: shift the player's choice into the history
+            next_state = self.q.next_state(self.state, RPS_CHOICES.index(player_choice))
 
             # Q-learning update
-            table[ai_choice] += ALPHA * (ai_reward + GAMMA * max(next_state_q_values.values()) - table[ai_choice])
+            # (small rows are faster to reduce as lists than through NumPy)
+            values[self.state, action] += ALPHA * (ai_reward + GAMMA * max(values[next_state].tolist()) - values[self.state, action])
+            self.q.dirty.add(self.state)
 
             # Update the current state
             self.state = next_state
 
-        outcome = RPS_OUTCOMES[(player_choice, ai_choice)]  # Outcome from player's perspective
+        if self.history:
+            self.transitions[self.history[-1][0]][player_choice] += 1
         self.history.append((player_choice, ai_choice))
+        self.meta.update(RPS_CHOICES.index(player_choice))
 
         # Update scores based on outcome (player's perspective)
         if outcome == 1:  # Player wins
@@ -112,4 +190,4 @@ class RPS:
         elif outcome == -1:  # AI wins
             self.score[1] += 1
 
-        return ai_choice, outcome
\ No newline at end of file
+        return outcome
@@ -1,11 +1,13 @@
 import pygame
-from ui import Button
+from ui import Button, DirtyCanvas, render_text
 from rps import RPS
-from config import WIDTH, HEIGHT, BG_COLOR, WHITE, init_fonts, MESSAGE_BG
+from config import WIDTH, HEIGHT, BG_COLOR, WHITE, init_fonts
+from utils import RPS_CHOICES
 
 class RPSGameScene:
-    def __init__(self, q_table):
+    def __init__(self, q_table, records=None):
         self.game = RPS(q_table)
+        self.records = records  # GameLog each round is appended to (None for no log)
         self.result = ""
         font_large, font_medium, font_small = init_fonts()
         self.font_large = font_large
@@ -25,17 +27,27 @@ class RPSGameScene:
             Button(50, HEIGHT - 70, 100, 50, "Back", font_medium, lambda: 'main_menu'),
             Button(WIDTH - 150, HEIGHT - 70, 100, 50, "Reset", font_medium, lambda: self.reset())
         ]
+        self.canvas = DirtyCanvas(self.draw_static)
 
     def play(self, choice):
         if self.game and self.mode:
             ai_choice, outcome = self.game.play(choice, self.mode)
             if ai_choice is not None:
+                if self.records is not None:  # Outcome -1 (you lose) indexes to winner 2, the AI
+                    self.records.record('rps', ('human', self.mode), (0, 1, 2)[outcome],
+                                        [RPS_CHOICES.index(choice), RPS_CHOICES.index(ai_choice)])
                 outcome_text = {1: 'Win', 0: 'Tie', -1: 'Lose'}[outcome]
                 self.result = f"You: {choice.capitalize()} vs AI: {ai_choice.capitalize()} -> You {outcome_text}!"
             else:
                 self.result = "Invalid choice!"
         return None
 
+    def set_mode(self, mode):
+        """Selects the AI mode; the scene is shared by all modes, so switching starts a fresh game."""
+        if mode != self.mode:
+            self.reset()
+        self.mode = mode
+
     def reset(self):
         self.game.reset()
         self.result = ""
@@ -53,20 +65,18 @@ class RPSGameScene:
     def update(self):
         pass
 
+    def draw_static(self, surface):
+        """Draws the layer that never changes: background and title."""
+        surface.fill(BG_COLOR)
+        title_surface = render_text(self.font_large, "Rock Paper Scissors", WHITE)
+        surface.blit(title_surface, title_surface.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100)))
+
     def draw(self, screen):
-        screen.fill(BG_COLOR)
-        title_surface = self.font_large.render("Rock Paper Scissors", True, WHITE)
-        title_rect = title_surface.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100))
-        screen.blit(title_surface, title_rect)
-        score_surface = self.font_medium.render(f"Score You: {self.game.score[0]} | AI: {self.game.score[1]}", True, WHITE)
-        score_rect = score_surface.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 50))
-        screen.blit(score_surface, score_rect)
-        pos = pygame.mouse.get_pos()
-        for button in self.buttons:
-            hover = button.rect.collidepoint(pos)
-            button.draw(screen, hover)
-        if self.result:
-            result_surface = self.font_small.render(self.result, True, WHITE)
-            result_rect = result_surface.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-            pygame.draw.rect(screen, MESSAGE_BG, result_rect.inflate(20, 20), border_radius=5)
-            screen.blit(result_surface, result_rect)
\ No newline at end of file
+        """Draws the frame, redrawing only the widgets that changed; returns the dirty rects."""
+        canvas = self.canvas
+        canvas.begin(screen)
+        canvas.text('score', self.font_medium, f"Score You: {self.game.score[0]} | AI: {self.game.score[1]}",
+                    (WIDTH // 2, HEIGHT // 2 - 50))
+        canvas.buttons(self.buttons)
+        canvas.message('result', self.font_small, self.result, (WIDTH // 2, HEIGHT // 2), (20, 20))
+        return canvas.end()
@@ -0,0 +1,79 @@
+"""
+Scene lookup for Game and SceneManager.
+Scenes are built on first navigation, and every AI mode of a game shares one
+scene (and engine); navigation sets the mode on it. Factories take the Q-table
+store and the game-record log.
+"""
+
+def _main_menu(q_tables, records):
+    from main_menu_scene import MainMenuScene
+    return MainMenuScene()
+
+def _settings(q_tables, records):
+    from settings_scene import SettingsScene
+    return SettingsScene(q_tables)
+
+def _mode_select(game_type):
+    def build(q_tables, records):
+        from mode_select_scene import ModeSelectScene
+        return ModeSelectScene(game_type)
+    return build
+
+def _ttt(q_tables, records):
+    from ttt_game_scene import TTTGameScene
+    return TTTGameScene(q_tables.get('ttt'), records)
+
+def _rps(q_tables, records):
+    from rps_game_scene import RPSGameScene
+    return RPSGameScene(q_tables.get('rps'), records)
+
+def _c4(q_tables, records):
+    from connect4_game_scene import Connect4GameScene
+    return Connect4GameScene(q_tables.get('c4'), records=records)
+
+SCENE_FACTORIES = {
+    'main_menu': _main_menu,
+    'settings': _settings,
+    'ttt_select': _mode_select('ttt'),
+    'rps_select': _mode_select('rps'),
+    'c4_select': _mode_select('c4'),
+    'ttt': _ttt,
+    'rps': _rps,
+    'c4': _c4,
+}
+
+# AI modes of each game; the scene key "<game>_<mode>" resolves to the game's shared scene
+GAME_MODES = {
+    'ttt': ('naive', 'biassed', 'minimax', 'rl'),
+    'rps': ('naive', 'biassed', 'rl', 'meta'),
+    'c4': ('naive', 'biassed', 'minimax', 'mcts', 'rl'),
+}
+
+class SceneRegistry:
+    """
+    Maps scene keys such as 'main_menu' or 'ttt_minimax' to scene instances,
+    building each one the first time it is looked up.
+    """
+    def __init__(self, q_tables, records=None):
+        """
+        Args:
+            q_tables (QTableStore): Source of the Q-tables handed to the game scenes.
+            records (GameLog): Log the game scenes append finished rounds to (None for no log).
+        """
+        self.q_tables = q_tables
+        self.records = records
+        self.scenes = {}  # Scenes built so far, by factory key
+        self.aliases = {f"{game}_{mode}": game for game, modes in GAME_MODES.items() for mode in modes}
+
+    def _resolve(self, key):
+        return self.aliases.get(key, key)
+
+    def __contains__(self, key):
+        return self._resolve(key) in SCENE_FACTORIES
+
+    def __getitem__(self, key):
+        key = self._resolve(key)
+        scene = self.scenes.get(key)
+        if scene is None:
+            scene = self.scenes[key] = SCENE_FACTORIES[key](self.q_tables, self.records)
+        return scene
@@ -1,10 +1,10 @@
 import pygame
-from ui import Button
-from config import WIDTH, HEIGHT, BG_COLOR, WHITE, init_fonts, MESSAGE_BG
-from persistence import reset_q_table
+from ui import Button, DirtyCanvas, render_text
+from config import WIDTH, HEIGHT, BG_COLOR, WHITE, init_fonts
 
 class SettingsScene:
-    def __init__(self):
+    def __init__(self, q_tables):
+        self.q_tables = q_tables  # QTableStore the resets go through, so its checkpoints do not restore old rows
         font_large, font_medium, font_small = init_fonts()
         self.message = ""
         button_width = 300
@@ -14,17 +14,18 @@ class SettingsScene:
         button_spacing = 70
 
         self.buttons = [
-            Button(button_x, button_y_start, button_width, button_height, "Reset Tic-Tac-Toe AI", font_medium, lambda: self.reset_ai('q_table_ttt.json')),
-            Button(button_x, button_y_start + button_spacing, button_width, button_height, "Reset RPS AI", font_medium, lambda: self.reset_ai('q_table_rps.json')),
-            Button(button_x, button_y_start + 2 * button_spacing, button_width, button_height, "Reset Connect 4 AI", font_medium, lambda: self.reset_ai('q_table_c4.json')),
+            Button(button_x, button_y_start, button_width, button_height, "Reset Tic-Tac-Toe AI", font_medium, lambda: self.reset_ai('ttt')),
+            Button(button_x, button_y_start + button_spacing, button_width, button_height, "Reset RPS AI", font_medium, lambda: self.reset_ai('rps')),
+            Button(button_x, button_y_start + 2 * button_spacing, button_width, button_height, "Reset Connect 4 AI", font_medium, lambda: self.reset_ai('c4')),
             Button(50, HEIGHT - 70, 100, 50, "Back", font_medium, lambda: 'main_menu')
         ]
-        self.title_surface = font_large.render("Settings", True, WHITE)
+        self.title_surface = render_text(font_large, "Settings", WHITE)
         self.title_rect = self.title_surface.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 200))
+        self.canvas = DirtyCanvas(self.draw_static)
         self.font_small = font_small
 
-    def reset_ai(self, filename):
-        self.message = reset_q_table(filename)
+    def reset_ai(self, game_type):
+        self.message = self.q_tables.reset(game_type)
         return None
 
     def handle_event(self, event):
@@ -39,15 +40,14 @@ class SettingsScene:
     def update(self):
         pass
 
+    def draw_static(self, surface):
+        """Draws the layer that never changes: background and title."""
+        surface.fill(BG_COLOR)
+        surface.blit(self.title_surface, self.title_rect)
+
     def draw(self, screen):
-        screen.fill(BG_COLOR)
-        screen.blit(self.title_surface, self.title_rect)
-        pos = pygame.mouse.get_pos()
-        for button in self.buttons:
-            hover = button.rect.collidepoint(pos)
-            button.draw(screen, hover)
-        if self.message:
-            message_surface = self.font_small.render(self.message, True, WHITE)
-            message_rect = message_surface.get_rect(center=(WIDTH // 2, HEIGHT - 100))
-            pygame.draw.rect(screen, MESSAGE_BG, message_rect.inflate(20, 10), border_radius=5)
-            screen.blit(message_surface, message_rect)
\ No newline at end of file
+        """Draws the frame, redrawing only the widgets that changed; returns the dirty rects."""
+        self.canvas.begin(screen)
+        self.canvas.buttons(self.buttons)
+        self.canvas.message('message', self.font_small, self.message, (WIDTH // 2, HEIGHT - 100), (20, 10))
+        return self.canvas.end()
@@ -0,0 +1,285 @@
+"""
+Headless self-play for the game engines: no display, fonts or scenes.
+Episodes are split across a multiprocessing pool and the learners' Q-tables
+are merged when every worker is done. Finished games are appended to the
+game-record log (game_log.py) unless --record is empty.
+
+Examples (run from the game directory):
+    python train.py rps --opponent biased --episodes 100000 --workers 4
+    python train.py ttt --p1 minimax --p2 biassed --episodes 10000
+    python train.py ttt --p1 rl --p2 rl --episodes 100000 --workers 4
+    python train.py c4 --p1 minimax --p2 biassed --episodes 20
+    python train.py c4 --p1 rl --p2 rl --episodes 1000000
+"""
+import argparse
+import multiprocessing
+import random
+import time
+import numpy as np
+from rps import RPS
+from ttt import TicTacToe
+from connect4 import Connect4
+from qtable import QTable
+from persistence import load_q_table, save_q_table
+from utils import EPSILON, RPS_CHOICES
+from game_log import GameLog, encode_record, LOG_FILE
+
+RPS_MODES = ('naive', 'biased', 'rl', 'meta')
+TTT_MODES = ('naive', 'biassed', 'minimax', 'rl')
+C4_MODES = ('naive', 'biassed', 'minimax', 'mcts', 'rl')
+
+def split_episodes(episodes, workers):
+    """Splits `episodes` into `workers` near-equal chunks."""
+    return [episodes // workers + (1 if i < episodes % workers else 0) for i in range(workers)]
+
+def run_rps(job):
+    """
+    Trains the RPS Q-learner against a bot for a chunk of episodes.
+    Each episode is one game record, the learner being player 1.
+    Args:
+        job (tuple): (QTable, opponent mode, episodes, rounds per episode, seed, whether to record games).
+    Returns:
+        tuple: (trained QTable, [ties, learner wins, opponent wins], encoded game records).
+    """
+    table, opponent, episodes, rounds, seed, recording = job
+    random.seed(seed)
+    learner = RPS(table)
+    bot = RPS(QTable(table.history))  # The bot learns only from its own games
+    results = [0, 0, 0]
+    records = bytearray()
+    for _ in range(episodes):
+        learner.reset()
+        bot.reset()
+        moves, wins = [], [0, 0, 0]
+        for _ in range(rounds):
+            learner_choice = learner.choose('rl')
+            bot_choice = bot.choose(opponent)
+            # Each side sees the other as the player; outcomes are from the bot's side here
+            outcome = learner.record(bot_choice, learner_choice, 'rl')
+            bot.record(learner_choice, bot_choice, opponent)
+            results[-outcome] += 1
+            if recording:
+                wins[-outcome] += 1
+                moves += (RPS_CHOICES.index(learner_choice), RPS_CHOICES.index(bot_choice))
+        if recording:
+            winner = 0 if wins[1] == wins[2] else 1 if wins[1] > wins[2] else 2
+            records += encode_record('rps', ('rl', opponent), winner, moves)
+    return learner.q, results, bytes(records)
+
+def run_board(job):
+    """
+    Plays bot-vs-bot games of Tic Tac Toe or Connect 4.
+    When a TTT side plays 'rl', every move of the game (either side's) trains the
+    Q-table, which explores with probability EPSILON.
+    Args:
+        job (tuple): (game name 'ttt' or 'c4', player 1 mode, player 2 mode, episodes, seed, TTT Q-table,
+            whether to record games).
+    Returns:
+        tuple: (trained Q-table or None, [draws, player 1 wins, player 2 wins], encoded game records).
+    """
+    game_name, p1, p2, episodes, seed, table, recording = job
+    random.seed(seed)
+    game = TicTacToe(table) if game_name == 'ttt' else Connect4()
+    learning = game_name == 'ttt' and 'rl' in (p1, p2)
+    if learning:
+        game.learning = True
+        game.epsilon = EPSILON
+    results = [0, 0, 0]
+    records = bytearray()
+    for _ in range(episodes):
+        game.new_round()
+        result = None
+        while result is None:
+            result = game.play(game.ai_move(p1 if game.current == 1 else p2))
+        results[result[0]] += 1
+        if recording:
+            records += encode_record(game_name, (p1, p2), result[0], game.history)
+    return (game.qtable if learning else None), results, bytes(records)
+
+def alpha_schedule(text):
+    """
+    Parses a learning-rate schedule such as '0.001:600000,0.0005', for argparse.
+    Each step is a rate and the number of games it runs for; the last rate's count
+    may be left out, and it then runs for the remaining games.
+    Returns:
+        list: (rate, games or None) steps.
+    """
+    steps = []
+    try:
+        for step in text.split(','):
+            rate, _, games = step.partition(':')
+            steps.append((float(rate), int(games) if games else None))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid schedule {text!r}: expected RATE[:GAMES],...")
+    if any(games is None for _, games in steps[:-1]):
+        raise argparse.ArgumentTypeError(f"invalid schedule {text!r}: only the last rate may omit its games")
+    return steps
+
+def schedule_phases(schedule, episodes, total):
+    """
+    Scales a schedule written for `total` games to a worker's `episodes`.
+    Returns:
+        list: (rate, games) phases adding up to `episodes`.
+    """
+    phases, left = [], episodes
+    for rate, games in schedule:
+        n = left if games is None else min(left, round(games * episodes / total))
+        if n:
+            phases.append((rate, n))
+            left -= n
+    if left:
+        phases.append((schedule[-1][0], left))  # The steps cover fewer games than asked: the last rate runs on
+    return phases
+
+def run_c4_rl(job):
+    """
+    Trains the Connect 4 n-tuple network by TD self-play for a chunk of episodes.
+    The games are played as arrays, so none are recorded.
+    Args:
+        job (tuple): (NTupleNetwork, (learning rate, episodes) phases, seed); phase i uses seed + 1000 * i.
+    Returns:
+        tuple: (trained network, [draws, player 1 wins, player 2 wins], b'' for the game records).
+    """
+    network, phases, seed = job
+    results = [0, 0, 0]
+    for i, (alpha, episodes) in enumerate(phases):
+        counts = network.train_self_play(episodes, alpha=alpha, epsilon=EPSILON, seed=seed + 1000 * i)
+        results = [a + b for a, b in zip(results, counts)]
+    return network, results, b''
+
+def merge_networks(networks):
+    """Averages n-tuple networks trained in parallel from the same starting weights."""
+    merged = networks[0]
+    merged.weights = np.mean([n.weights for n in networks], axis=0).astype(np.float32)
+    return merged
+
+def merge_q_tables(tables):
+    """
+    Averages Q-tables trained in parallel from the same starting table.
+    Args:
+        tables (list): QTable instances with the same history length.
+    Returns:
+        QTable: A table holding the mean of every Q-value.
+    """
+    merged = QTable(tables[0].history)
+    merged.values = np.mean([t.values for t in tables], axis=0)
+    merged.extra = dict(tables[0].extra)
+    return merged
+
+def merge_dict_tables(tables):
+    """
+    Averages Q-tables in the dict layout trained in parallel from the same starting table.
+    Each value is averaged over the tables that hold it, so a state one worker
+    never visited does not pull the others' values towards zero.
+    Args:
+        tables (list): Dicts mapping states to {action: Q-value}.
+    Returns:
+        dict: The merged table.
+    """
+    sums = {}
+    for table in tables:
+        for state, row in table.items():
+            merged = sums.setdefault(state, {})
+            for action, value in row.items():
+                total, count = merged.get(action, (0.0, 0))
+                merged[action] = (total + value, count + 1)
+    return {state: {action: total / count for action, (total, count) in row.items()} for state, row in sums.items()}
+
+def run_jobs(worker, jobs):
+    """Runs the jobs in a process pool, or in this process when there is only one."""
+    if len(jobs) == 1:
+        return [worker(jobs[0])]
+    with multiprocessing.Pool(len(jobs)) as pool:
+        return pool.map(worker, jobs)
+
+def parse_args(argv=None):
+    # Options every game takes, given after the game name
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help="processes to spread episodes over")
+    common.add_argument('--seed', type=int, default=None, help="base random seed (worker i uses seed + i)")
+    common.add_argument('--record', default=LOG_FILE,
+                        help="game-record log to append finished games to ('' for none; rl-vs-rl Connect 4 is never recorded)")
+
+    parser = argparse.ArgumentParser(description="Headless self-play and training for the AI Game Suite.")
+    games = parser.add_subparsers(dest='game', required=True)
+
+    rps = games.add_parser('rps', parents=[common], help="train the RPS Q-learner against a bot")
+    rps.add_argument('--opponent', choices=RPS_MODES, default='biased')
+    rps.add_argument('--episodes', type=int, default=10000)
+    rps.add_argument('--rounds', type=int, default=20, help="rounds per episode (history is reset between episodes)")
+    rps.add_argument('--history', type=int, default=None,
+                     help="player choices per Q-learning state (default: the table's own, or 2 for a new table)")
+    rps.add_argument('--table', default='q_table_rps.json', help="Q-table to start from and save to")
+
+    for name, modes in (('ttt', TTT_MODES), ('c4', C4_MODES)):
+        board = games.add_parser(name, parents=[common], help=f"play {name.upper()} bot-vs-bot matches")
+        board.add_argument('--p1', choices=modes, default='biassed')
+        board.add_argument('--p2', choices=modes, default='minimax')
+        board.add_argument('--episodes', type=int, default=1000)
+        if name == 'ttt':
+            board.add_argument('--table', default='q_table_ttt.json', help="Q-table the rl mode starts from and saves to")
+        else:
+            board.add_argument('--network', default='c4_ntuple.bin', help="n-tuple network rl self-play starts from and saves to")
+            board.add_argument('--alpha', type=alpha_schedule, default=[(0.001, None)],
+                               help="learning rate of rl self-play, or a schedule RATE:GAMES,...,RATE "
+                                    "(e.g. 0.001:600000,0.0001)")
+            board.add_argument('--restart', action='store_true',
+                               help="train a new network instead of continuing the one in --network")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 31)
+    chunks = [n for n in split_episodes(args.episodes, max(1, args.workers)) if n]
+
+    start = time.perf_counter()
+    if args.game == 'rps':
+        table = QTable.from_dict(load_q_table(args.table), args.history)
+        outputs = run_jobs(run_rps, [(table, args.opponent, n, args.rounds, seed + i, bool(args.record))
+                                    for i, n in enumerate(chunks)])
+        labels = ("ties", "learner wins", f"{args.opponent} wins")
+    elif args.game == 'c4' and args.p1 == args.p2 == 'rl':
+        from ntuple import open_network, NTupleNetwork  # NumPy-heavy; only needed here
+        network = (None if args.restart else open_network(args.network)) or NTupleNetwork.create()
+        trained_games = network.games
+        outputs = run_jobs(run_c4_rl, [(network, schedule_phases(args.alpha, n, args.episodes), seed + i)
+                                       for i, n in enumerate(chunks)])
+        labels = ("draws", "p1 (rl) wins", "p2 (rl) wins")
+    else:
+        table = load_q_table(args.table) if args.game == 'ttt' else None
+        if table is not None and not isinstance(table, dict):
+            table = dict(table.items())  # A mapped binary table cannot be sent to the workers
+        outputs = run_jobs(run_board, [(args.game, args.p1, args.p2, n, seed + i, table, bool(args.record))
+                                      for i, n in enumerate(chunks)])
+        labels = ("draws", f"p1 ({args.p1}) wins", f"p2 ({args.p2}) wins")
+    elapsed = time.perf_counter() - start
+
+    results = [sum(out[1][i] for out in outputs) for i in range(3)]
+    total = sum(results)
+    print(f"{args.game}: {args.episodes:,} episodes on {len(chunks)} worker(s) in {elapsed:.1f} s "
+          f"({args.episodes / elapsed * 3600:,.0f} episodes/hour), seed {seed}")
+    print(" | ".join(f"{label} {count} ({count / total:.1%})" for label, count in zip(labels, results)))
+
+    if args.record and any(out[2] for out in outputs):
+        log = GameLog(args.record)
+        for out, n in zip(outputs, chunks):
+            log.append_encoded(out[2], n)
+        log.close()
+        print(f"Appended {args.episodes:,} game records to {args.record}")
+
+    if args.game == 'rps':
+        save_q_table(merge_q_tables([out[0] for out in outputs]).to_dict(), args.table)
+        print(f"Saved merged Q-table to {args.table}")
+    elif args.game == 'c4':
+        if outputs[0][0] is not None:
+            from ntuple import write_network
+            network = merge_networks([out[0] for out in outputs])
+            network.games = trained_games + total
+            write_network(network, args.network)
+            print(f"Saved n-tuple network ({network.games:,} games) to {args.network}")
+    elif outputs[0][0] is not None:
+        save_q_table(merge_dict_tables([out[0] for out in outputs]), args.table)
+        print(f"Saved merged Q-table to {args.table}")
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,203 @@
 import random
-from utils import board_to_key, valid_moves, check_win
+from utils import board_to_key, player_mask, check_win_mask, empty_mask, mask_cells, WIN_COMBOS, WIN_MASKS, ALPHA, GAMMA
+
+# --- Perfect-play table ---
+# The 8 symmetries of the 3x3 board (4 rotations, each optionally mirrored).
+# Each one is a tuple `perm` where cell i of the transformed board is cell perm[i].
+_ROTATE = (6, 3, 0, 7, 4, 1, 8, 5, 2)
+_MIRROR = (2, 1, 0, 5, 4, 3, 8, 7, 6)
+
+def _build_symmetries():
+    perms = []
+    perm = tuple(range(9))
+    for _ in range(4):
+        perms.append(perm)
+        perms.append(tuple(perm[i] for i in _MIRROR))
+        perm = tuple(perm[i] for i in _ROTATE)
+    return tuple(perms)
+
+SYMMETRIES = _build_symmetries()
+_POWERS = tuple(3 ** i for i in range(9))
+NO_MOVE = 255
+_perfect_moves = None  # bytearray indexed by canonical board code, built on first use
+
+def board_code(board):
+    """Encodes a board as a base-3 integer (cell i is digit i)."""
+    return sum(v * p for v, p in zip(board, _POWERS))
+
+def canonical(board):
+    """
+    Finds the symmetry that maps the board to its canonical form.
+    Returns:
+        tuple: (code, perm) with the smallest code among the 8 transformed boards
+            and the permutation that produces it.
+    """
+    return min((board_code([board[i] for i in perm]), perm) for perm in SYMMETRIES)
+
+def _solve(board, player, moves, memo):
+    """
+    Solves a position by negamax over canonical boards, filling `moves`.
+    Returns:
+        int: Score for `player` (to move): 0 for a draw, positive for a win and
+            negative for a loss, larger in size the sooner the game ends.
+    """
+    code, perm = canonical(board)
+    if code in memo:
+        return memo[code]
+    # Search in the canonical frame so the stored move applies to the canonical board
+    board = [board[i] for i in perm]
+    empties = [i for i, v in enumerate(board) if v == 0]
+    own = player_mask(board, player)
+    best_score, best_move = None, NO_MOVE
+    for m in empties:
+        board[m] = player
+        if check_win_mask(own | (1 << m)):
+            score = len(empties)  # Sooner wins leave more empty cells
+        elif len(empties) == 1:
+            score = 0
+        else:
+            score = -_solve(board, 3 - player, moves, memo)
+        board[m] = 0
+        if best_score is None or score > best_score:
+            best_score, best_move = score, m
+    memo[code] = best_score
+    moves[code] = best_move
+    return best_score
+
+def perfect_moves():
+    """
+    Returns the perfect-play table, solving every reachable position on first use.
+    The table maps the canonical code of each non-final position to its best cell
+    (in the canonical frame); other codes hold NO_MOVE.
+    """
+    global _perfect_moves
+    if _perfect_moves is None:
+        moves = bytearray([NO_MOVE]) * (3 ** 9)
+        _solve([0] * 9, 1, moves, {})
+        _perfect_moves = moves
+    return _perfect_moves
+
+def perfect_move(board):
+    """
+    Looks up the best move for the player to move (X moves first).
+    Args:
+        board (list): The current 1D Tic Tac Toe board.
+    Returns:
+        int: The index of the best cell, or None if the position is not in the table.
+    """
+    code, perm = canonical(board)
+    move = perfect_moves()[code]
+    if move == NO_MOVE:
+        return None
+    return perm[move]  # Canonical cell `move` is cell perm[move] of the real board
+
+# --- Q-learning ---
+# The Q-table maps str(canonical board code) to {str(canonical cell): Q-value}, the
+# q_table_ttt.json layout. Boards that are symmetric share one row, and values are
+# for the player to move (whose turn follows from the piece counts), so a single
+# table plays and learns both sides.
+
+def q_state(board):
+    """
+    Finds the Q-table row of a board.
+    Returns:
+        tuple: (key, perm) where canonical cell i is cell perm[i] of the real board.
+    """
+    code, perm = canonical(board)
+    return str(code), perm
 
 class TicTacToe:
     """
     Implements the Tic Tac Toe game logic.
-    Supports player moves and AI moves (naive, biassed, minimax).
+    Supports player moves and AI moves (naive, biassed, minimax, rl).
     """
     def __init__(self, qtable):
-        self.board = [0] * 9  # 0: empty, 1: player X, 2: player O (AI)
-        self.current = 1      # Current player: 1 for human, 2 for AI
-        self.qtable = qtable  # Q-table for RL agent (not used by minimax)
-        self.game_over = False
+        self.qtable = qtable  # Q-table for the rl mode (not used by minimax)
+        self.dirty = getattr(qtable, 'dirty', None)  # States changed since the last checkpoint, if the table tracks them
+        self.learning = False # Whether every move played updates the Q-table
+        self.epsilon = 0.0    # Exploration rate of the rl mode; games play greedily, training explores
         self.score = [0, 0]   # [Player X (You) Score, Player O (AI) Score]
+        self.new_round()
 
     def reset(self):
-        self.board = [0] * 9
-        self.current = 1
-        self.game_over = False
+        self.new_round()
         self.score = [0, 0]
 
     def new_round(self):
-        self.board = [0] * 9
-        self.current = 1
+        self.board = [0] * 9  # 0: empty, 1: player X, 2: player O (AI)
+        self.masks = [0, 0]   # 9-bit masks of the cells held by player 1 and player 2
+        self.current = 1      # Current player: 1 for human, 2 for AI
+        self.history = []     # Cells played this round, in order
         self.game_over = False
 
     def play(self, pos):
-        if self.game_over or self.board[pos] != 0 or not (0 <= pos < 9):
+        if self.game_over or not (0 <= pos < 9) or self.board[pos] != 0:
             return None
 
+        if self.learning:
+            state, perm = q_state(self.board)
         self.board[pos] = self.current
-        win = check_win(self.board, self.current)
+        self.masks[self.current - 1] |= 1 << pos
+        self.history.append(pos)
+        line = check_win_mask(self.masks[self.current - 1])
 
-        if win:
+        if line:
             self.game_over = True
-            return (self.current, win)
-        if not valid_moves(self.board):
+            result = (self.current, WIN_COMBOS[WIN_MASKS.index(line)])
+        elif not empty_mask(*self.masks):
             self.game_over = True
-            return (0, None)
+            result = (0, None)
+        else:
+            self.current = 3 - self.current
+            result = None
+        if self.learning:
+            self.q_update(state, perm.index(pos), result)
+        return result
 
-        self.current = 3 - self.current
-        return None
+    def _q_row(self, state):
+        """Returns the Q-table row of `state`, adding it with every empty cell at 0 if it is new."""
+        row = self.qtable.get(state)
+        if row is None:
+            code = int(state)
+            row = self.qtable[state] = {str(i): 0.0 for i in range(9) if code // _POWERS[i] % 3 == 0}
+        return row
+
+    def q_update(self, state, action, result):
+        """
+        Q-learning update for the move just played, seen from the player who made it.
+        Args:
+            state (str): Q-table key of the board before the move.
+            action (int): The move's cell in the canonical frame of `state`.
+            result (tuple): What `play` returned for the move.
+        """
+        row = self._q_row(state)
+        if result is not None:
+            target = 1.0 if result[0] else 0.0  # The mover won, or filled the board
+        else:
+            # The opponent moves next: its best value is the mover's loss
+            next_row = self._q_row(q_state(self.board)[0])
+            target = -GAMMA * max(next_row.values())
+        key = str(action)
+        row[key] += ALPHA * (target - row[key])
+        if self.dirty is not None:
+            self.dirty.add(state)
+
+    def rl_move(self, moves):
+        """
+        Picks the empty cell with the best Q-value (ties at random), exploring with probability `epsilon`.
+        Args:
+            moves (list): The empty cells.
+        Returns:
+            int: The chosen cell.
+        """
+        if self.epsilon and random.random() < self.epsilon:
+            return random.choice(moves)
+        state, perm = q_state(self.board)
+        row = self.qtable.get(state)
+        if not row:
+            return random.choice(moves)
+        best = max(row.values())
+        return perm[int(random.choice([a for a, q_value in row.items() if q_value == best]))]
 
     def _minimax(self, board, depth, is_maximizing):
         """
@@ -51,33 +209,37 @@ class TicTacToe:
         Returns:
             int: The heuristic value of the board state.
         """
+        return self._minimax_masks(player_mask(board, 1), player_mask(board, 2), depth, is_maximizing)
+
+    def _minimax_masks(self, human, ai, depth, is_maximizing):
+        """Minimax over the players' bitmasks; scores match `_minimax`."""
         # Terminal state checks
-        if check_win(board, 2):  # AI (O, maximizing player) wins
+        if check_win_mask(ai):  # AI (O, maximizing player) wins
             return 10 - depth
-        if check_win(board, 1):  # Human (X, minimizing player) wins
+        if check_win_mask(human):  # Human (X, minimizing player) wins
             return depth - 10
-        if not valid_moves(board):  # Draw
+        empty = empty_mask(human, ai)
+        if not empty:  # Draw
             return 0
 
         if is_maximizing:
             best_score = -float('inf')
-            for move in valid_moves(board):
-                board[move] = 2  # AI's move
-                score = self._minimax(board, depth + 1, False)
-                board[move] = 0  # Undo move
-                best_score = max(score, best_score)
+            while empty:
+                move = empty & -empty  # AI's move on the lowest empty cell
+                empty ^= move
+                best_score = max(self._minimax_masks(human, ai | move, depth + 1, False), best_score)
             return best_score
         else:  # Minimizing player
             best_score = float('inf')
-            for move in valid_moves(board):
-                board[move] = 1  # Player's move
-                score = self._minimax(board, depth + 1, True)
-                board[move] = 0  # Undo move
-                best_score = min(score, best_score)
+            while empty:
+                move = empty & -empty  # Player's move on the lowest empty cell
+                empty ^= move
+                best_score = min(self._minimax_masks(human | move, ai, depth + 1, True), best_score)
             return best_score
 
-    def ai_move(self, mode):
-        moves = valid_moves(self.board)
+    def ai_move(self, mode, stop=None):
+        # `stop` is accepted for the same call as Connect4.ai_move; every mode here answers at once
+        moves = mask_cells(empty_mask(*self.masks))
         if not moves:
             return None
 
@@ -86,26 +248,19 @@ class TicTacToe:
         
         elif mode == 'biassed':
             # Heuristic: Check for win, then block, then take center
-            for target_player in [2, 1]:  # First check for AI win (2), then player block (1)
+            # First check for a win for the side to move (the AI), then block the opponent
+            for target_player in [self.current, 3 - self.current]:
+                own = self.masks[target_player - 1]
                 for m in moves:
-                    self.board[m] = target_player
-                    if check_win(self.board, target_player):
-                        self.board[m] = 0
+                    if check_win_mask(own | (1 << m)):
                         return m
-                    self.board[m] = 0
             return 4 if 4 in moves else random.choice(moves)
 
-        elif mode == 'minimax':  # Unbeatable AI
-            best_score = -float('inf')
-            best_move = None
-            for move in moves:
-                self.board[move] = 2  # Try a move for the AI
-                # Start recursion for the minimizing player (human)
-                score = self._minimax(list(self.board), 0, False)
-                self.board[move] = 0  # Undo the move
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-            return best_move
+        elif mode == 'minimax':  # Unbeatable AI, read from the precomputed table
+            move = perfect_move(self.board)
+            return move if move is not None else random.choice(moves)
+
+        elif mode == 'rl':  # Q-learning agent over symmetry-folded boards
+            return self.rl_move(moves)
 
         return random.choice(moves) # Fallback
@@ -1,12 +1,14 @@
 import pygame
-from ui import Button
+from ui import Button, DirtyCanvas
+from ai_worker import AIMove
 from ttt import TicTacToe
-from config import WIDTH, HEIGHT, BG_COLOR, WHITE, GRID_COLOR, BORDER_COLOR, X_COLOR, O_COLOR, HIGHLIGHT, MESSAGE_BG
+from config import WIDTH, HEIGHT, THINKING_DELAY_MS, BG_COLOR, GRID_COLOR, BORDER_COLOR, X_COLOR, O_COLOR, HIGHLIGHT
 from utils import init_fonts
 
 class TTTGameScene:
-    def __init__(self, q_table):
+    def __init__(self, q_table, records=None):
         self.game = TicTacToe(q_table)
+        self.records = records  # GameLog each finished round is appended to (None for no log)
         self.cell_size = 100
         self.grid_x = (WIDTH - 3 * self.cell_size) // 2
         self.grid_y = (HEIGHT - 3 * self.cell_size) // 2
@@ -19,11 +21,39 @@ class TTTGameScene:
         self.font_small = font_small
         self.mode = None
         self.buttons = [
-            Button(50, HEIGHT - 70, 100, 50, "Back", font_medium, lambda: 'main_menu'),
+            Button(50, HEIGHT - 70, 100, 50, "Back", font_medium, self.leave),
             Button(WIDTH - 150, HEIGHT - 70, 100, 50, "Reset", font_medium, lambda: self.reset())
         ]
+        self.canvas = DirtyCanvas(self.draw_static)
+        self.pending = None  # AIMove computing the AI's reply
+        self.pending_since = 0
+
+    def set_mode(self, mode):
+        """Selects the AI mode; the scene is shared by all modes, so switching starts a fresh game."""
+        if mode != self.mode:
+            self.reset()
+        self.mode = mode
+        self.game.learning = mode == 'rl'  # Both sides' moves train the Q-table, saved at quit
+        if self.game.current == 2 and not self.game.game_over and self.pending is None:
+            self.start_ai_move()  # Resume the reply abandoned by leaving the scene
+
+    def start_ai_move(self):
+        """Starts the AI's reply in the background; update() plays it once it is ready."""
+        self.pending = AIMove(self.game, self.mode)
+        self.pending_since = pygame.time.get_ticks()
+
+    def cancel_ai_move(self):
+        """Abandons the AI's reply, if one is being computed."""
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+
+    def leave(self):
+        self.cancel_ai_move()
+        return 'main_menu'
 
     def reset(self):
+        self.cancel_ai_move()
         self.game.reset()
         self.message = ""
         self.message_timer = 0
@@ -32,11 +62,13 @@ class TTTGameScene:
 
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-            return 'main_menu'
+            return self.leave()
         for button in self.buttons:
             result = button.check_click(event)
             if result is not None:
                 return result
+        if self.pending is not None:
+            return None  # The board is the AI's until its move is played
         if event.type == pygame.MOUSEBUTTONDOWN and not self.message:
             x, y = event.pos
             col = (x - self.grid_x) // self.cell_size
@@ -48,11 +80,7 @@ class TTTGameScene:
                     if res:
                         self.handle_game_end(res)
                     else:
-                        ai_move = self.game.ai_move(self.mode)
-                        if ai_move is not None:
-                            res2 = self.game.play(ai_move)
-                            if res2:
-                                self.handle_game_end(res2)
+                        self.start_ai_move()
                 else:
                     self.message = "Invalid Move: Cell not empty!"
                     self.message_timer = pygame.time.get_ticks()
@@ -60,6 +88,8 @@ class TTTGameScene:
 
     def handle_game_end(self, result):
         player_won, combo = result
+        if self.records is not None:
+            self.records.record('ttt', ('human', self.mode), player_won, self.game.history)
         self.highlight = combo if combo else []
         if player_won == 0:
             self.message = "It's a Draw!"
@@ -72,50 +102,64 @@ class TTTGameScene:
         self.message_timer = pygame.time.get_ticks()
         self.game.new_round()
 
+    def is_active(self):
+        """True while the AI is thinking or a message is counting down, so the game loop keeps ticking."""
+        return self.pending is not None or bool(self.message_timer)
+
     def update(self):
+        if self.pending is not None and self.pending.done():
+            ai_move = self.pending.result()
+            self.pending = None
+            if ai_move is not None:
+                res = self.game.play(ai_move)
+                if res:
+                    self.handle_game_end(res)
         if self.message and (pygame.time.get_ticks() - self.message_timer > self.message_duration):
             self.message = ""
             self.message_timer = 0
             self.highlight = []
 
-    def draw(self, screen):
-        screen.fill(BG_COLOR)
-        score_surface = self.font_medium.render(f"Score: You {self.game.score[0]} | AI {self.game.score[1]}", True, WHITE)
-        score_rect = scoreSscore_rect = score_surface.get_rect(center=(WIDTH // 2, self.grid_y - 50))
-        screen.blit(score_surface, score_rect)
-
-        pygame.draw.rect(screen, GRID_COLOR, (self.grid_x, self.grid_y, 3 * self.cell_size, 3 * self.cell_size), border_radius=10)
-        pygame.draw.rect(screen, BORDER_COLOR, (self.grid_x, self.grid_y, 3 * self.cell_size, 3 * self.cell_size), 5, border_radius=10)
+    def draw_static(self, surface):
+        """Draws the layer that never changes: background, grid and border."""
+        surface.fill(BG_COLOR)
+        pygame.draw.rect(surface, GRID_COLOR, (self.grid_x, self.grid_y, 3 * self.cell_size, 3 * self.cell_size), border_radius=10)
+        pygame.draw.rect(surface, BORDER_COLOR, (self.grid_x, self.grid_y, 3 * self.cell_size, 3 * self.cell_size), 5, border_radius=10)
         for i in range(1, 3):
-            pygame.draw.line(screen, BORDER_COLOR, (self.grid_x + i * self.cell_size, self.grid_y),
+            pygame.draw.line(surface, BORDER_COLOR, (self.grid_x + i * self.cell_size, self.grid_y),
                              (self.grid_x + i * self.cell_size, self.grid_y + 3 * self.cell_size), 3)
-            pygame.draw.line(screen, BORDER_COLOR, (self.grid_x, self.grid_y + i * self.cell_size),
+            pygame.draw.line(surface, BORDER_COLOR, (self.grid_x, self.grid_y + i * self.cell_size),
                              (self.grid_x + 3 * self.cell_size, self.grid_y + i * self.cell_size), 3)
 
-        for idx, val in enumerate(self.game.board):
-            x0 = self.grid_x + (idx % 3) * self.cell_size
-            y0 = self.grid_y + (idx // 3) * self.cell_size
-            padding = self.cell_size // 6
-            if val == 1:
-                pygame.draw.line(screen, X_COLOR, (x0 + padding, y0 + padding),
-                                 (x0 + self.cell_size - padding, y0 + self.cell_size - padding), 8)
-                pygame.draw.line(screen, X_COLOR, (x0 + self.cell_size - padding, y0 + padding),
-                                 (x0 + padding, y0 + self.cell_size - padding), 8)
-            elif val == 2:
-                pygame.draw.circle(screen, O_COLOR, (x0 + self.cell_size // 2, y0 + self.cell_size // 2),
-                                   self.cell_size // 2 - 10, 8)
-
-        for r, c in self.highlight:
-            pygame.draw.rect(screen, HIGHLIGHT, (self.grid_x + c * self.cell_size + 2,
-                                                 self.grid_y + r * self.cell_size + 2, self.cell_size - 4, self.cell_size - 4), 6, border_radius=5)
+    def cell_rect(self, idx):
+        return pygame.Rect(self.grid_x + (idx % 3) * self.cell_size, self.grid_y + (idx // 3) * self.cell_size,
+                           self.cell_size, self.cell_size)
 
-        pos = pygame.mouse.get_pos()
-        for button in self.buttons:
-            hover = button.rect.collidepoint(pos)
-            button.draw(screen, hover)
+    def draw_cell(self, screen, idx, val, highlighted):
+        x0, y0 = self.cell_rect(idx).topleft
+        padding = self.cell_size // 6
+        if val == 1:
+            pygame.draw.line(screen, X_COLOR, (x0 + padding, y0 + padding),
+                             (x0 + self.cell_size - padding, y0 + self.cell_size - padding), 8)
+            pygame.draw.line(screen, X_COLOR, (x0 + self.cell_size - padding, y0 + padding),
+                             (x0 + padding, y0 + self.cell_size - padding), 8)
+        elif val == 2:
+            pygame.draw.circle(screen, O_COLOR, (x0 + self.cell_size // 2, y0 + self.cell_size // 2),
+                               self.cell_size // 2 - 10, 8)
+        if highlighted:
+            pygame.draw.rect(screen, HIGHLIGHT, (x0 + 2, y0 + 2, self.cell_size - 4, self.cell_size - 4), 6, border_radius=5)
 
-        if self.message:
-            message_surface = self.font_small.render(self.message, True, WHITE)
-            message_rect = message_surface.get_rect(center=(WIDTH // 2, HEIGHT - 100))
-            pygame.draw.rect(screen, MESSAGE_BG, message_rect.inflate(20, 10), border_radius=5)
-            screen.blit(message_surface, message_rect)
\ No newline at end of file
+    def draw(self, screen):
+        """Draws the frame, redrawing only the cells and widgets that changed; returns the dirty rects."""
+        canvas = self.canvas
+        canvas.begin(screen)
+        canvas.text('score', self.font_medium, f"Score: You {self.game.score[0]} | AI {self.game.score[1]}",
+                    (WIDTH // 2, self.grid_y - 50))
+        if self.pending is not None and pygame.time.get_ticks() - self.pending_since >= THINKING_DELAY_MS:
+            canvas.text('thinking', self.font_small, "AI is thinking...", (WIDTH // 2, self.grid_y - 20))
+        for idx, val in enumerate(self.game.board):
+            highlighted = (idx // 3, idx % 3) in self.highlight
+            canvas.piece(idx, (val, highlighted), self.cell_rect(idx),
+                         lambda s, idx=idx, val=val, highlighted=highlighted: self.draw_cell(s, idx, val, highlighted))
+        canvas.buttons(self.buttons)
+        canvas.message('message', self.font_small, self.message, (WIDTH // 2, HEIGHT - 100), (20, 10))
+        return canvas.end()
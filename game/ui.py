@@ -1,4 +1,213 @@
 import pygame
+from collections import OrderedDict
+import config
+
+TEXT_CACHE_SIZE = 256  # Rendered text surfaces kept before the least recently used is dropped
+_text_cache = OrderedDict()
+
+def render_text(font, text, color, antialias=True):
+    """
+    Renders text through a shared LRU cache, so unchanged text is rendered once
+    rather than every frame.
+    Args:
+        font (pygame.font.Font): The font to render with.
+        text (str): The text.
+        color (tuple): RGB text color.
+        antialias (bool): Whether to antialias the glyphs.
+    Returns:
+        pygame.Surface: The rendered text; callers must not draw onto it.
+    """
+    key = (font, text, color, antialias)
+    surface = _text_cache.get(key)
+    if surface is None:
+        surface = _text_cache[key] = font.render(text, antialias, color)
+        if len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    else:
+        _text_cache.move_to_end(key)
+    return surface
+
+_canvas_on_screen = None  # The DirtyCanvas that drew the current screen contents
+
+def invalidate_screen():
+    """Makes the next frame a full redraw, e.g. after the window was exposed."""
+    global _canvas_on_screen
+    _canvas_on_screen = None
+
+def present(dirty):
+    """
+    Shows a drawn frame.
+    Args:
+        dirty (list): Rects returned by a scene's draw(), or None to flip the whole frame.
+    """
+    if dirty is None:
+        pygame.display.flip()
+    elif dirty:
+        pygame.display.update(dirty)
+
+class DirtyCanvas:
+    """
+    Draws a scene as a pre-rendered static layer plus pieces that are redrawn
+    only when their state changes.
+    Each frame the scene lists its pieces in drawing order, each with a key, a
+    state and the rect it covers. At the end of the frame the areas of changed
+    pieces are restored from the static layer, every piece overlapping a
+    restored area is redrawn too (so pieces may overlap), and the restored
+    areas are returned as the dirty rects. A frame is drawn in full when the
+    scene was not the last to draw on the screen, or every time when
+    config.DIRTY_RECTS is off.
+    """
+    def __init__(self, draw_static):
+        """
+        Args:
+            draw_static (callable): Draws the static layer (background, grid, titles)
+                onto the surface it is given; called once.
+        """
+        self.draw_static = draw_static
+        self.static = None
+        self.drawn = {}   # key -> (state, rect) of every piece on screen
+        self.pieces = []  # (key, state, rect, draw) listed this frame
+        self.full = True
+
+    def begin(self, screen):
+        """Starts a frame, redrawing it in full if the screen holds something else."""
+        global _canvas_on_screen
+        if self.static is None:
+            self.static = pygame.Surface(screen.get_size()).convert(screen)
+            self.draw_static(self.static)
+        self.screen = screen
+        self.pieces = []
+        self.full = _canvas_on_screen is not self or not config.DIRTY_RECTS
+        _canvas_on_screen = self
+
+    def piece(self, key, state, rect, draw):
+        """
+        Lists a piece for this frame.
+        Args:
+            key (hashable): Identifies the piece across frames.
+            state (hashable): Everything the piece's look depends on.
+            rect (pygame.Rect): The area the piece covers.
+            draw (callable): Draws the piece onto the surface it is given.
+        """
+        self.pieces.append((key, state, rect, draw))
+
+    def end(self):
+        """
+        Draws the changed pieces.
+        Returns:
+            list: The dirty rects for present(), or None to flip the whole frame.
+        """
+        screen, drawn = self.screen, self.drawn
+        if self.full:
+            screen.blit(self.static, (0, 0))
+            for _, _, _, draw in self.pieces:
+                draw(screen)
+            self.drawn = {key: (state, rect) for key, state, rect, _ in self.pieces}
+            return [screen.get_rect()] if config.DIRTY_RECTS else None
+
+        listed = {key for key, _, _, _ in self.pieces}
+        damage = [rect for key, (_, rect) in drawn.items() if key not in listed]
+        redraw = [False] * len(self.pieces)
+        for i, (key, state, rect, _) in enumerate(self.pieces):
+            previous = drawn.get(key)
+            if previous is None or previous[0] != state:
+                redraw[i] = True
+                if previous is not None:
+                    damage.append(previous[1])
+                damage.append(rect)
+        if not damage:
+            return []
+
+        # Restoring an area wipes every piece overlapping it, which in turn must be restored and redrawn
+        grown = True
+        while grown:
+            grown = False
+            for i, (_, _, rect, _) in enumerate(self.pieces):
+                if not redraw[i] and rect.collidelist(damage) != -1:
+                    redraw[i] = grown = True
+                    damage.append(rect)
+
+        for rect in damage:
+            screen.blit(self.static, rect, rect)
+        for i, (key, state, rect, draw) in enumerate(self.pieces):
+            if redraw[i]:
+                draw(screen)
+        self.drawn = {key: (state, rect) for key, state, rect, _ in self.pieces}
+        return damage
+
+    def buttons(self, buttons):
+        """Lists Buttons as pieces that change with their hover state."""
+        pos = pygame.mouse.get_pos()
+        for button in buttons:
+            hover = button.rect.collidepoint(pos)
+            self.piece(button, hover, button.rect, lambda s, button=button, hover=hover: button.draw(s, hover))
+
+    def text(self, key, font, text, center):
+        """Lists a line of white text centred on `center` as a piece."""
+        surface = render_text(font, text, config.WHITE)
+        rect = surface.get_rect(center=center)
+        self.piece(key, text, rect, lambda s: s.blit(surface, rect))
+
+    def message(self, key, font, text, center, padding):
+        """Lists a line of text on a MESSAGE_BG box as a piece; nothing is listed for empty text."""
+        if not text:
+            return
+        surface = render_text(font, text, config.WHITE)
+        rect = surface.get_rect(center=center)
+        box = rect.inflate(*padding)
+        def draw(s):
+            pygame.draw.rect(s, config.MESSAGE_BG, box, border_radius=5)
+            s.blit(surface, rect)
+        self.piece(key, text, box, draw)
+
+class ProfileOverlay:
+    """
+    A live table of the profiler's percentiles, drawn over the top-left corner
+    of every frame. The text is re-rendered at most every REFRESH_MS; the
+    background is opaque, so drawing it again each frame leaves nothing behind.
+    """
+    REFRESH_MS = 250
+
+    def __init__(self, profiler, font):
+        """
+        Args:
+            profiler (Profiler): Source of the figures.
+            font (pygame.font.Font): Font of the table.
+        """
+        self.profiler = profiler
+        self.font = font
+        self.surface = None
+        self.rendered_at = None
+
+    def render(self):
+        lines = ["Profile ms   p50 / p95 / p99   (F3 hide, F4 export)"]
+        for name, row in self.profiler.summary().items():
+            lines.append(f"{name}  {row['p50'] * 1000:.2f} / {row['p95'] * 1000:.2f} / {row['p99'] * 1000:.2f}  n={row['count']}")
+        height = self.font.get_linesize()
+        surfaces = [self.font.render(line, True, config.WHITE) for line in lines]
+        surface = pygame.Surface((max(s.get_width() for s in surfaces) + 12, height * len(lines) + 8))
+        surface.fill(config.MESSAGE_BG)
+        for i, line in enumerate(surfaces):
+            surface.blit(line, (6, 4 + i * height))
+        if self.surface is not None and not surface.get_rect().contains(self.surface.get_rect()):
+            invalidate_screen()  # The table shrank: redraw the frame so its old edges do not linger
+        self.surface = surface
+
+    def draw(self, screen, dirty):
+        """
+        Draws the table over a finished frame.
+        Args:
+            screen (pygame.Surface): The frame.
+            dirty (list): The scene's dirty rects, or None for a full flip.
+        Returns:
+            list: `dirty` plus the table's rect, or None for a full flip.
+        """
+        now = pygame.time.get_ticks()
+        if self.surface is None or now - self.rendered_at >= self.REFRESH_MS:
+            self.render()
+            self.rendered_at = now
+        rect = screen.blit(self.surface, (8, 8))
+        return None if dirty is None else dirty + [rect]
 
 class Button:
     def __init__(self, x, y, width, height, text, font, on_click=None):
@@ -6,7 +215,7 @@ class Button:
         self.text = text
         self.font = font
         self.on_click = on_click
-        self.text_surface = font.render(text, True, (255, 255, 255))
+        self.text_surface = render_text(font, text, (255, 255, 255))
 
     def draw(self, screen, hover, button_color=(100, 100, 100), hover_color=(150, 150, 150)):
         color = hover_color if hover else button_color
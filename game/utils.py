@@ -1,5 +1,6 @@
-import pygame
-from pygame.locals import QUIT, KEYDOWN, K_ESCAPE
+# Game logic and constants only: pygame is only imported when init_fonts runs, so the
+# engines (ttt, rps, connect4) can be imported without it.
+
 # --- Constants ---
 GRID_SIZE = 3
 CELL_SIZE = 100  # Cell size for Tic Tac Toe board
@@ -40,6 +41,12 @@ WIN_COMBOS = [
     [(0,0),(1,1),(2,2)], [(0,2),(1,1),(2,0)]                       # Diagonals
 ]
 
+# --- Tic Tac Toe Bitmasks ---
+# A player's pieces as a 9-bit mask: bit (row * 3 + col) is set for each occupied cell.
+# WIN_MASKS[i] is the mask of the line WIN_COMBOS[i].
+WIN_MASKS = [sum(1 << (r * GRID_SIZE + c) for r, c in combo) for combo in WIN_COMBOS]
+FULL_MASK = (1 << (GRID_SIZE * GRID_SIZE)) - 1 # Every cell occupied
+
 # --- Rock Paper Scissors Choices and Outcomes ---
 RPS_CHOICES = ['rock', 'paper', 'scissors']
 # Dictionary mapping (player_choice, ai_choice) to outcome from player's perspective:
@@ -49,6 +56,8 @@ RPS_OUTCOMES = {
     ('paper', 'rock'): 1, ('paper', 'paper'): 0, ('paper', 'scissors'): -1,
     ('scissors', 'rock'): -1, ('scissors', 'paper'): 1, ('scissors', 'scissors'): 0
 }
+# Choice that beats each choice
+RPS_COUNTER = {'rock': 'paper', 'paper': 'scissors', 'scissors': 'rock'}
 
 # --- Utility Functions ---
 def init_fonts():
@@ -57,10 +66,10 @@ def init_fonts():
     Returns:
         tuple: Three Pygame font objects (font_large, font_medium, font_small).
     """
-    pygame.font.init()
-    font_large = pygame.font.Font(None, 48)  # Large font for titles
-    font_medium = pygame.font.Font(None, 36)  # Medium font for buttons and scores
-    font_small = pygame.font.Font(None, 24)  # Small font for messages
+    from config import load_font  # Shared font cache (imports pygame)
+    font_large = load_font(None, 48)  # Large font for titles
+    font_medium = load_font(None, 36)  # Medium font for buttons and scores
+    font_small = load_font(None, 24)  # Small font for messages
     return font_large, font_medium, font_small
 
 def board_to_key(board):
@@ -84,6 +93,60 @@ def valid_moves(board):
     """
     return [i for i, v in enumerate(board) if v == 0]
 
+def player_mask(board, player):
+    """
+    Converts the cells of one player on a 1D Tic Tac Toe board to a 9-bit mask.
+    Args:
+        board (list): The current 1D Tic Tac Toe board.
+        player (int): The player whose cells are collected (1 or 2).
+    Returns:
+        int: Mask with bit i set when board[i] == player.
+    """
+    mask = 0
+    for i, v in enumerate(board):
+        if v == player:
+            mask |= 1 << i
+    return mask
+
+def check_win_mask(mask):
+    """
+    Checks if a player's 9-bit mask contains a winning line.
+    Args:
+        mask (int): The player's cells as a bitmask.
+    Returns:
+        int: The mask of the first completed line in WIN_MASKS, else 0.
+    """
+    for line in WIN_MASKS:
+        if mask & line == line:
+            return line
+    return 0
+
+def empty_mask(mask1, mask2):
+    """
+    Returns the empty cells of the board as a 9-bit mask.
+    Args:
+        mask1 (int): Cells of player 1.
+        mask2 (int): Cells of player 2.
+    Returns:
+        int: Mask of the cells neither player occupies (0 when the board is full).
+    """
+    return FULL_MASK & ~(mask1 | mask2)
+
+def mask_cells(mask):
+    """
+    Lists the cell indices set in a 9-bit mask, in increasing order.
+    Args:
+        mask (int): A board bitmask.
+    Returns:
+        list: 0-indexed cells whose bit is set.
+    """
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
+
 def check_win(board, player):
     """
     Checks if the given player has won the Tic Tac Toe game.
@@ -93,12 +156,8 @@ def check_win(board, player):
     Returns:
         list: A list of (row, col) tuples forming the winning combination if player won, else None.
     """
-    # Convert linear board to 2D for easier combo checking with WIN_COMBOS
-    # Each inner list represents a row of the 3x3 board
-    board_2d = [[board[r*GRID_SIZE+c] for c in range(GRID_SIZE)] for r in range(GRID_SIZE)]
-    for combo in WIN_COMBOS:
-        # Check if all positions in the current winning combination are occupied by the player
-        if all(board_2d[r][c] == player for r,c in combo):
-            return combo # Return the winning combination if found
+    line = check_win_mask(player_mask(board, player))
+    if line:
+        return WIN_COMBOS[WIN_MASKS.index(line)] # Return the winning combination if found
     return None # No winning combination found for the given player
 